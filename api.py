@@ -0,0 +1,263 @@
+import os
+import logging
+import zipfile
+from io import BytesIO
+from contextlib import asynccontextmanager
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import Depends, FastAPI, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from models import CategoryEnum
+from service_layer import ReceiptProcessor
+from text_extraction import SUPPORTED_EXTENSIONS
+from export_engine import ALL_EXPORT_COLUMNS, EXPORT_FORMATS
+from ocr_pool import get_reader_pool
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+API_MAX_UPLOAD_BYTES = int(os.getenv("API_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Zip archives in bulk uploads: the cap applies to both the upload and its expanded receipts.
+API_MAX_ARCHIVE_BYTES = int(os.getenv("API_MAX_ARCHIVE_BYTES", str(100 * 1024 * 1024)))
+API_MAX_ARCHIVE_FILES = int(os.getenv("API_MAX_ARCHIVE_FILES", "1000"))
+API_WARM_OCR = os.getenv("API_WARM_OCR", "false").lower() in ("1", "true", "yes")
+API_MAX_PAGE_SIZE = 200
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One processor per worker process: its DB pool, LLM client, OCR readers and
+    # job workers are shared by every request that process serves.
+    processor = ReceiptProcessor()
+    processor.jobs.start()
+    if API_WARM_OCR:
+        await run_in_threadpool(get_reader_pool().warm_up)
+    app.state.processor = processor
+    try:
+        yield
+    finally:
+        processor.jobs.stop(timeout=5)
+
+
+app = FastAPI(title="Receipt Manager API", lifespan=lifespan)
+
+
+def get_processor(request: Request) -> ReceiptProcessor:
+    return request.app.state.processor
+
+
+def bill_filters(
+    q: Optional[str] = Query(None, description="Full-text search over vendor names and descriptions"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[CategoryEnum] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None
+) -> Dict:
+    return {
+        "query": q,
+        "start_date": start_date,
+        "end_date": end_date,
+        "category": category,
+        "min_amount": min_amount,
+        "max_amount": max_amount,
+    }
+
+
+def _extension(filename: Optional[str]) -> str:
+    extension = Path(filename or "").suffix.lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(415, f"Unsupported file type: {extension or filename!r}")
+    return extension
+
+
+async def _read_upload(upload: UploadFile, limit: int = API_MAX_UPLOAD_BYTES) -> bytes:
+    file_bytes = await upload.read(limit + 1)
+    if len(file_bytes) > limit:
+        raise HTTPException(413, f"{upload.filename} is larger than {limit} bytes")
+    return file_bytes
+
+
+def _enqueue_import(processor: ReceiptProcessor, file_bytes: bytes, extension: str, name: str, save: bool) -> str:
+    if save:
+        return processor.enqueue_job(
+            "import_upload", payload=file_bytes, label=name, file_extension=extension, file_reference=name
+        )
+    return processor.enqueue_upload(file_bytes, extension, label=name)
+
+
+def _enqueue_archive(processor: ReceiptProcessor, archive_bytes: bytes, archive_name: str) -> Tuple[List[Dict], List[Dict]]:
+    """Queue an import job per supported receipt in a zip archive, enforcing the archive limits.
+
+    Declared sizes are checked first, then entries are decompressed one at a
+    time with bounded reads, so an archive whose headers understate its
+    contents still stops after ``API_MAX_UPLOAD_BYTES`` of output per entry.
+    """
+    jobs, rejected = [], []
+    try:
+        archive = zipfile.ZipFile(BytesIO(archive_bytes))
+    except zipfile.BadZipFile:
+        return jobs, [{"file": archive_name, "error": "Not a valid zip archive"}]
+    expanded = 0
+    with archive:
+        entries = [
+            info for info in archive.infolist()
+            if not info.is_dir() and Path(info.filename).suffix.lower() in SUPPORTED_EXTENSIONS
+        ]
+        if len(entries) > API_MAX_ARCHIVE_FILES:
+            return jobs, [{"file": archive_name, "error": f"More than {API_MAX_ARCHIVE_FILES} receipts in archive"}]
+        if sum(info.file_size for info in entries) > API_MAX_ARCHIVE_BYTES:
+            return jobs, [{"file": archive_name, "error": f"Expands to more than {API_MAX_ARCHIVE_BYTES} bytes"}]
+        for info in entries:
+            if info.file_size > API_MAX_UPLOAD_BYTES:
+                rejected.append({"file": info.filename, "error": f"Larger than {API_MAX_UPLOAD_BYTES} bytes"})
+                continue
+            with archive.open(info) as entry:
+                file_bytes = entry.read(API_MAX_UPLOAD_BYTES + 1)
+            if len(file_bytes) > API_MAX_UPLOAD_BYTES:
+                rejected.append({"file": info.filename, "error": f"Larger than {API_MAX_UPLOAD_BYTES} bytes"})
+                continue
+            expanded += len(file_bytes)
+            if expanded > API_MAX_ARCHIVE_BYTES:
+                rejected.append({"file": archive_name, "error": f"Expands to more than {API_MAX_ARCHIVE_BYTES} bytes"})
+                break
+            job_id = _enqueue_import(processor, file_bytes, Path(info.filename).suffix.lower(), info.filename, True)
+            jobs.append({"job_id": job_id, "file": info.filename})
+    return jobs, rejected
+
+
+@app.get("/health")
+def health() -> Dict:
+    return {"status": "ok"}
+
+
+@app.post("/receipts", status_code=202)
+async def upload_receipt(
+    file: UploadFile = File(...),
+    save: bool = Query(True, description="Save the bill; false only extracts the fields for review"),
+    processor: ReceiptProcessor = Depends(get_processor)
+) -> Dict:
+    """Queue one receipt for OCR and parsing; poll ``/jobs/{job_id}`` for the result"""
+    extension = _extension(file.filename)
+    file_bytes = await _read_upload(file)
+    job_id = await run_in_threadpool(_enqueue_import, processor, file_bytes, extension, file.filename, save)
+    return {"job_id": job_id, "file": file.filename}
+
+
+@app.post("/receipts/bulk", status_code=202)
+async def upload_receipts(
+    files: List[UploadFile] = File(...),
+    processor: ReceiptProcessor = Depends(get_processor)
+) -> Dict:
+    """Queue several receipts (zip archives are expanded), one import job per receipt"""
+    jobs, rejected = [], []
+    for upload in files:
+        if Path(upload.filename or "").suffix.lower() == ".zip":
+            try:
+                archive_bytes = await _read_upload(upload, limit=API_MAX_ARCHIVE_BYTES)
+            except HTTPException as e:
+                rejected.append({"file": upload.filename, "error": e.detail})
+                continue
+            archive_jobs, archive_rejected = await run_in_threadpool(
+                _enqueue_archive, processor, archive_bytes, upload.filename
+            )
+            jobs.extend(archive_jobs)
+            rejected.extend(archive_rejected)
+            continue
+        try:
+            extension = _extension(upload.filename)
+            file_bytes = await _read_upload(upload)
+        except HTTPException as e:
+            rejected.append({"file": upload.filename, "error": e.detail})
+            continue
+        job_id = await run_in_threadpool(_enqueue_import, processor, file_bytes, extension, upload.filename, True)
+        jobs.append({"job_id": job_id, "file": upload.filename})
+    return {"jobs": jobs, "rejected": rejected}
+
+
+@app.get("/jobs")
+def list_jobs(limit: int = Query(20, ge=1, le=200), processor: ReceiptProcessor = Depends(get_processor)) -> List[Dict]:
+    return processor.list_jobs(limit=limit)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, processor: ReceiptProcessor = Depends(get_processor)) -> Dict:
+    job = processor.get_job(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str, processor: ReceiptProcessor = Depends(get_processor)) -> Dict:
+    if processor.get_job(job_id) is None:
+        raise HTTPException(404, "Job not found")
+    if not processor.jobs.cancel(job_id):
+        raise HTTPException(409, "Only queued jobs can be cancelled")
+    return {"job_id": job_id, "status": "cancelled"}
+
+
+@app.get("/bills")
+def search_bills(
+    filters: Dict = Depends(bill_filters),
+    cursor: Optional[str] = None,
+    page_size: int = Query(25, ge=1, le=API_MAX_PAGE_SIZE),
+    sort_by: str = Query("date", pattern="^(date|amount|vendor|category|relevance)$"),
+    sort_desc: bool = True,
+    processor: ReceiptProcessor = Depends(get_processor)
+) -> Dict:
+    """One keyset page of matching bills; pass ``next_cursor`` back as ``cursor`` for the next page"""
+    try:
+        bills, next_cursor = processor.search_bills_page(
+            cursor=cursor, page_size=page_size, sort_by=sort_by, sort_desc=sort_desc, **filters
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {"bills": bills, "next_cursor": next_cursor}
+
+
+@app.get("/bills/{bill_id}/text")
+def get_bill_text(bill_id: int, processor: ReceiptProcessor = Depends(get_processor)) -> Dict:
+    stored = processor.db_handler.get_receipt_text(bill_id)
+    if stored is None:
+        raise HTTPException(404, "No stored text for this bill")
+    return stored
+
+
+@app.get("/statistics")
+def get_statistics(filters: Dict = Depends(bill_filters), processor: ReceiptProcessor = Depends(get_processor)) -> Dict:
+    return processor.get_statistics(**filters)
+
+
+@app.get("/analytics/{period}")
+def get_analytics(period: str, processor: ReceiptProcessor = Depends(get_processor)) -> Dict:
+    try:
+        return processor.get_spending_analytics(period)
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+
+
+@app.get("/export")
+def export_bills(
+    format: str = Query("csv", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    columns: Optional[List[str]] = Query(None, description=f"Subset of {ALL_EXPORT_COLUMNS}"),
+    filters: Dict = Depends(bill_filters),
+    processor: ReceiptProcessor = Depends(get_processor)
+) -> StreamingResponse:
+    """Stream the matching bills; rows are read and encoded chunk by chunk"""
+    unknown = set(columns or []) - set(ALL_EXPORT_COLUMNS)
+    if unknown:
+        raise HTTPException(400, f"Unknown export columns: {sorted(unknown)}")
+    spec = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        processor.export_stream(format, columns=columns, **filters),
+        media_type=spec["mime"],
+        headers={"Content-Disposition": f'attachment; filename="receipts_{date.today()}{spec["extension"]}"'}
+    )
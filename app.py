@@ -6,9 +6,13 @@ from io import StringIO
 import io
 from typing import Optional
 import time
+import uuid
 import plotly.express as px
-from models import CategoryEnum
+from models import CategoryEnum, engine
+from db_handler import DatabaseHandler
 from service_layer import ReceiptProcessor
+from extraction_cache import content_hash
+from export_engine import EXPORT_COLUMNS, EXPORT_FORMATS
 import streamlit.components.v1 as components
 
 st.set_page_config(page_title="Receipt Manager", layout="wide", page_icon="🧾")
@@ -277,10 +281,70 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner=False)
+def get_engine():
+    return engine
+
+@st.cache_resource(show_spinner=False)
+def get_db_handler():
+    get_engine()
+    return DatabaseHandler()
+
+@st.cache_resource(show_spinner=False)
 def get_processor():
-    return ReceiptProcessor()
+    processor = ReceiptProcessor(db_handler=get_db_handler())
+    # Start workers now so jobs queued or interrupted before a restart run without waiting for a new submit.
+    if processor.jobs.workers > 0:
+        processor.jobs.start()
+    return processor
+
+def reset_resources():
+    """Drop the cached processor, handler and engine so the next rerun rebuilds them."""
+    get_processor().jobs.stop(timeout=0)
+    get_processor.clear()
+    get_db_handler.clear()
+    get_engine.clear()
+    DatabaseHandler.reset_schema_cache()
+    engine.dispose()
 
 processor = get_processor()
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+JOB_POLL_INTERVAL = 2
+JOB_STATUS_ICONS = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌", "cancelled": "🚫"}
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def upload_job_status():
+    """Poll the current upload's job and rerun the app once its extracted data is ready."""
+    job_id = st.session_state.get("upload_job_id")
+    job = processor.get_job(job_id) if job_id else None
+    if job is None:
+        return
+    if job["status"] == "done":
+        st.session_state["last_extracted_data"] = job["result"]
+        st.session_state["upload_job_id"] = None
+        st.rerun()
+    elif job["status"] == "failed":
+        # Forget the file so the next full rerun (or the retry button) queues it again.
+        st.session_state["last_file_key"] = None
+        st.error(f"❌ Error processing file: {job['error']}")
+        if st.button("🔄 Retry", key="retry_upload_btn", use_container_width=True):
+            st.rerun()
+    elif job["status"] == "running":
+        st.info("🔍 Processing receipt...")
+    else:
+        st.info("⏳ Receipt queued for processing...")
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def background_jobs():
+    """This session's recent background jobs."""
+    jobs = processor.list_jobs(owner=session_id, limit=5)
+    if not jobs:
+        return
+    st.markdown("**Background jobs**")
+    for job in jobs:
+        label = job["label"] or job["kind"].replace("_", " ")
+        detail = f" — {job['error']}" if job["error"] else ""
+        st.caption(f"{JOB_STATUS_ICONS.get(job['status'], '')} {label}{detail}")
 
 with st.sidebar:
     st.markdown("""
@@ -323,22 +387,19 @@ with st.sidebar:
 
         if is_valid_file(uploaded_file):
             file_ext = uploaded_file.name.split(".")[-1]
-            file_key = f"{uploaded_file.name}_{uploaded_file.size}"
+            file_bytes = uploaded_file.getvalue()
+            file_key = content_hash(file_bytes)
 
             if st.session_state.get("last_file_key") != file_key:
-                with st.spinner("🔍 Processing receipt..."):
-                    try:
-                        extracted_data = processor.process_uploaded_file(
-                            uploaded_file.getvalue(),
-                            f".{file_ext}"
-                        )
-                        st.session_state["last_file_key"] = file_key
-                        st.session_state["last_extracted_data"] = extracted_data
-                    except Exception as e:
-                        st.error(f"❌ Error processing file: {str(e)}")
-                        st.session_state["last_extracted_data"] = None
-            else:
-                extracted_data = st.session_state.get("last_extracted_data")
+                # OCR and parsing run on a background worker; the fragment below polls for the result.
+                st.session_state["last_file_key"] = file_key
+                st.session_state["last_extracted_data"] = None
+                st.session_state["upload_job_id"] = processor.enqueue_upload(
+                    file_bytes, f".{file_ext}", owner=session_id, label=uploaded_file.name
+                )
+            extracted_data = st.session_state.get("last_extracted_data")
+            if extracted_data is None:
+                upload_job_status()
 
             if extracted_data:
                 with st.expander("✨ Extracted Data", expanded=True):
@@ -465,6 +526,17 @@ with st.sidebar:
             key="amount_range",
             label_visibility="collapsed"
         )
+    with st.expander("⚙️ Maintenance"):
+        if st.button("🔄 Reload resources", key="reload_resources_btn", use_container_width=True):
+            reset_resources()
+            st.rerun()
+        if st.button("📊 Rebuild spending rollups", key="rebuild_rollups_btn", use_container_width=True):
+            processor.enqueue_job("rebuild_rollups", owner=session_id, label="Rebuild spending rollups")
+        if st.button("🏷️ Merge duplicate vendors", key="dedupe_vendors_btn", use_container_width=True):
+            processor.enqueue_job("dedupe_vendors", owner=session_id, label="Merge duplicate vendors")
+        if st.button("🔁 Re-parse saved receipts", key="reprocess_btn", use_container_width=True):
+            processor.enqueue_job("reprocess", owner=session_id, label="Re-parse saved receipts")
+    background_jobs()
     st.markdown("""
     <style>
         /* Smooth transitions for all sidebar elements */
@@ -660,6 +732,7 @@ with tab1:
             st.error(f"Delete failed: {e}")
 
     sort_options = {
+        "Best match": ("relevance", False),
         "Vendor (A-Z)": ("vendor", False),
         "Vendor (Z-A)": ("vendor", True),
         "Amount (Low-High)": ("amount", False),
@@ -669,17 +742,32 @@ with tab1:
         "Category (A-Z)": ("category", False),
         "Category (Z-A)": ("category", True),
     }
-    sort_choice = st.selectbox("Sort by", list(sort_options.keys()), key="sort_choice")
+    sort_cols = st.columns([3, 1])
+    with sort_cols[0]:
+        sort_choice = st.selectbox("Sort by", list(sort_options.keys()), index=5, key="sort_choice")
+    with sort_cols[1]:
+        page_size = st.selectbox("Rows per page", [10, 25, 50, 100], index=1, key="page_size")
     sort_field, sort_reverse = sort_options[sort_choice]
 
+    page_signature = (
+        search_query, start_date, end_date, selected_category,
+        amount_range, sort_field, sort_reverse, page_size
+    )
+    if st.session_state.get("bill_page_signature") != page_signature:
+        st.session_state["bill_page_signature"] = page_signature
+        st.session_state["bill_page_cursors"] = [None]
+    page_cursors = st.session_state["bill_page_cursors"]
+
     with st.spinner("🔍 Loading bills..."):
-        bills = processor.search_bills(
+        bills, next_cursor = processor.search_bills_page(
             query=search_query if search_query else None,
             start_date=start_date,
             end_date=end_date,
             category=CategoryEnum(selected_category) if selected_category != "All" else None,
             min_amount=amount_range[0],
             max_amount=amount_range[1],
+            cursor=page_cursors[-1],
+            page_size=page_size,
             sort_by=sort_field,
             sort_desc=sort_reverse
         )
@@ -785,6 +873,21 @@ with tab1:
                     st.rerun()
             st.markdown("""<hr style="margin: 0.5rem 0; border: 0.5px solid #eee;">""", unsafe_allow_html=True)
 
+        pager_cols = st.columns([1, 2, 1])
+        with pager_cols[0]:
+            if st.button("◀ Previous", key="prev_page_btn", disabled=len(page_cursors) == 1, use_container_width=True):
+                page_cursors.pop()
+                st.rerun()
+        with pager_cols[1]:
+            st.markdown(
+                f"<div style='text-align: center; padding-top: 0.5rem;'>Page {len(page_cursors)}</div>",
+                unsafe_allow_html=True
+            )
+        with pager_cols[2]:
+            if st.button("Next ▶", key="next_page_btn", disabled=next_cursor is None, use_container_width=True):
+                page_cursors.append(next_cursor)
+                st.rerun()
+
         edit_id = st.session_state.get("edit_id")
         if edit_id:
             bill_to_edit = next((b for b in bills if b["id"] == edit_id), None)
@@ -874,7 +977,14 @@ with tab2:
 
     with st.container():
         st.markdown("### 💰 Summary Statistics")
-        stats = processor.get_statistics()
+        stats = processor.get_statistics(
+            query=search_query if search_query else None,
+            start_date=start_date,
+            end_date=end_date,
+            category=CategoryEnum(selected_category) if selected_category != "All" else None,
+            min_amount=amount_range[0],
+            max_amount=amount_range[1]
+        )
         
         if stats:
             cols = st.columns(5)
@@ -907,17 +1017,20 @@ with tab2:
             st.info("No data available for statistics")
 
     with st.expander("📈 Vendor Analysis", expanded=True):
-        bills_df = processor.export_to_dataframe()
+        vendor_frequency = processor.get_spending_analytics("vendor_frequency")
+        vendor_spend = processor.get_spending_analytics("vendor")
         
-        if not bills_df.empty:
+        if vendor_frequency["vendors"]:
             tab1, tab2 = st.tabs(["Vendor Frequency", "Top Vendors"])
             
             with tab1:
-                vendor_counts = bills_df["Vendor"].value_counts().reset_index()
-                vendor_counts.columns = ["Vendor", "Frequency"]
+                vendor_counts = pd.DataFrame({
+                    "Vendor": vendor_frequency["vendors"],
+                    "Frequency": vendor_frequency["counts"]
+                })
                 
                 fig = px.bar(
-                    vendor_counts.head(20),
+                    vendor_counts,
                     x="Vendor",
                     y="Frequency",
                     color="Frequency",
@@ -932,9 +1045,12 @@ with tab2:
                 st.plotly_chart(fig, use_container_width=True)
             
             with tab2:
-                top_vendors = bills_df.groupby("Vendor")["Amount"].sum().sort_values(ascending=False).head(10)
+                top_vendors = pd.DataFrame({
+                    "Vendor": vendor_spend["vendors"],
+                    "Total Spend": vendor_spend["amounts"]
+                }).head(10)
                 st.dataframe(
-                    top_vendors.reset_index().rename(columns={"Amount": "Total Spend"}),
+                    top_vendors,
                     use_container_width=True,
                     height=400
                 )
@@ -942,13 +1058,15 @@ with tab2:
             st.info("No vendor data available")
 
     with st.expander("⏳ Time Series Analysis", expanded=True):
-        if not bills_df.empty:
-            bills_df["Date"] = pd.to_datetime(bills_df["Date"], errors="coerce")
-            
+        monthly_spend = processor.get_spending_analytics("monthly")
+        if monthly_spend["labels"]:
             tab1, tab2 = st.tabs(["Monthly Trends", "Daily Trends"])
             
             with tab1:
-                monthly = bills_df.groupby(pd.Grouper(key="Date", freq="ME"))["Amount"].sum().reset_index()
+                monthly = pd.DataFrame({
+                    "Date": pd.to_datetime(monthly_spend["labels"], format="%Y-%m"),
+                    "Amount": monthly_spend["amounts"]
+                }).set_index("Date").asfreq("MS", fill_value=0).reset_index()
                 monthly["Rolling Mean"] = monthly["Amount"].rolling(window=3, min_periods=1).mean()
                 
                 fig = px.line(
@@ -962,7 +1080,11 @@ with tab2:
                 st.plotly_chart(fig, use_container_width=True)
             
             with tab2:
-                daily = bills_df.groupby("Date")["Amount"].sum().reset_index()
+                daily_spend = processor.get_spending_analytics("daily")
+                daily = pd.DataFrame({
+                    "Date": pd.to_datetime(daily_spend["labels"]),
+                    "Amount": daily_spend["amounts"]
+                })
                 fig2 = px.bar(
                     daily,
                     x="Date",
@@ -1060,11 +1182,17 @@ with tab3:
     st.markdown("### Select Export Format")
     export_format = st.radio(
         "Format",
-        options=["CSV", "JSON", "Excel"],
+        options=["CSV", "JSON Lines", "Excel", "Parquet", "Arrow"],
         format_func=lambda x: f"{x} 📄",
         horizontal=True,
         label_visibility="collapsed"
     )
+    export_format_keys = {"CSV": "csv", "JSON Lines": "ndjson", "Excel": "xlsx", "Parquet": "parquet", "Arrow": "arrow"}
+    export_filters = {
+        "start_date": export_start,
+        "end_date": export_end,
+        "category": export_selected_category if export_selected_category != "All" else None
+    }
     if st.button(
         "✨ Generate Export", 
         key="export_button",
@@ -1073,32 +1201,20 @@ with tab3:
     ):
         with st.spinner("Preparing your data..."):
             try:
-                time.sleep(0.5) 
+                with st.expander("🛠️ Select Columns", expanded=True):
+                    export_columns = st.multiselect(
+                        "Choose columns to include:",
+                        options=EXPORT_COLUMNS,
+                        default=EXPORT_COLUMNS,
+                        key="export_columns",
+                        label_visibility="collapsed"
+                    )
                 
-                df = processor.export_to_dataframe()
-                if not df.empty:
-                    start_ts = pd.to_datetime(export_start)
-                    end_ts = pd.to_datetime(export_end)
-                    df = df[(pd.to_datetime(df["Date"]) >= start_ts) & (pd.to_datetime(df["Date"]) <= end_ts)]
-                    
-                    if export_selected_category != "All":
-                        df = df[df["Category"] == export_selected_category]
-                    
-                    with st.expander("🛠️ Select Columns", expanded=True):
-                        export_columns = st.multiselect(
-                            "Choose columns to include:",
-                            options=list(df.columns),
-                            default=list(df.columns),
-                            key="export_columns",
-                            label_visibility="collapsed"
-                        )
-                    
-                    if export_columns:
-                        df = df[export_columns]
-                    
+                preview = processor.preview_export(limit=20, columns=export_columns or None, **export_filters)
+                if not preview.empty:
                     st.markdown("### Preview (First 20 Rows)")
                     st.dataframe(
-                        df.head(20),
+                        preview,
                         use_container_width=True,
                         height=400,
                         hide_index=True
@@ -1108,38 +1224,22 @@ with tab3:
                         st.markdown("### Download Options")
                     
                     with col2:
-                        if export_format == "CSV":
-                            csv = df.to_csv(index=False)
-                            st.download_button(
-                                "⬇️ Download CSV",
-                                data=csv,
-                                file_name=f"receipts_export_{date.today()}.csv",
-                                mime="text/csv",
-                                help="Download as CSV file",
-                                use_container_width=True
-                            )
-                        elif export_format == "JSON":
-                            json_data = df.to_json(orient="records", indent=2)
-                            st.download_button(
-                                "⬇️ Download JSON",
-                                data=json_data,
-                                file_name=f"receipts_export_{date.today()}.json",
-                                mime="application/json",
-                                help="Download as JSON file",
-                                use_container_width=True
-                            )
-                        else:  
+                        fmt = export_format_keys[export_format]
+
+                        def build_export(fmt=fmt, columns=export_columns or None, filters=dict(export_filters)):
+                            # Called by Streamlit only when the button is clicked, so the export runs on demand.
                             output = io.BytesIO()
-                            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                                df.to_excel(writer, index=False, sheet_name='Receipts')
-                            st.download_button(
-                                "⬇️ Download Excel",
-                                data=output.getvalue(),
-                                file_name=f"receipts_export_{date.today()}.xlsx",
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                help="Download as Excel file",
-                                use_container_width=True
-                            )
+                            processor.write_export(fmt, output, columns=columns, **filters)
+                            return output.getvalue()
+
+                        st.download_button(
+                            f"⬇️ Download {export_format}",
+                            data=build_export,
+                            file_name=f"receipts_export_{date.today()}{EXPORT_FORMATS[fmt]['extension']}",
+                            mime=EXPORT_FORMATS[fmt]["mime"],
+                            help=f"Download as {export_format} file",
+                            use_container_width=True
+                        )
                     
                     st.balloons()
                 else:
@@ -0,0 +1,184 @@
+import os
+import logging
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Union
+
+from dotenv import load_dotenv
+
+from db_handler import DatabaseHandler
+from models import BillEntryBase, VendorBase
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+PARQUET_IMPORT_BATCH_SIZE = int(os.getenv("PARQUET_IMPORT_BATCH_SIZE", "5000"))
+ARROW_FORMATS = ("parquet", "arrow")
+
+# Column name -> Arrow type name; "dictionary" columns are written dictionary-encoded.
+BILL_COLUMN_TYPES = {
+    "Date": "date",
+    "Vendor": "dictionary",
+    "Amount": "float",
+    "Category": "dictionary",
+    "Description": "string",
+    "File Reference": "string",
+}
+VENDOR_COLUMN_TYPES = {
+    "Name": "string",
+    "Category": "dictionary",
+}
+
+
+def _pyarrow():
+    """Import pyarrow on first use so it stays an optional dependency."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow support requires pyarrow (pip install pyarrow)") from e
+    return pa, pq
+
+
+def _arrow_type(pa, name: str):
+    return {
+        "date": pa.date32(),
+        "float": pa.float64(),
+        "string": pa.string(),
+        "dictionary": pa.dictionary(pa.int32(), pa.string()),
+    }[name]
+
+
+class _DictionaryEncoder:
+    """Dictionary-encodes one column across batches with a single growing dictionary.
+
+    Each batch's dictionary extends the previous one, so the Arrow IPC file
+    writer can emit it as a delta instead of a (disallowed) replacement.
+    """
+
+    def __init__(self, pa):
+        self.pa = pa
+        self._index: Dict[str, int] = {}
+        self._values: List[str] = []
+
+    def encode(self, values: Sequence[Optional[str]]):
+        indices = []
+        for value in values:
+            if value is None:
+                indices.append(None)
+                continue
+            position = self._index.get(value)
+            if position is None:
+                position = self._index[value] = len(self._values)
+                self._values.append(value)
+            indices.append(position)
+        return self.pa.DictionaryArray.from_arrays(
+            self.pa.array(indices, type=self.pa.int32()),
+            self.pa.array(self._values, type=self.pa.string())
+        )
+
+
+def write_table(
+    fmt: str,
+    fileobj: Union[str, BinaryIO],
+    columns: Sequence[str],
+    column_types: Dict[str, str],
+    chunks: Iterator[List[tuple]]
+) -> int:
+    """Write row chunks as Parquet (one row group per chunk) or an Arrow IPC file; return rows written"""
+    if fmt not in ARROW_FORMATS:
+        raise ValueError(f"Unsupported Arrow format: {fmt}")
+    pa, pq = _pyarrow()
+    schema = pa.schema([(c, _arrow_type(pa, column_types[c])) for c in columns])
+    encoders = {c: _DictionaryEncoder(pa) for c in columns if column_types[c] == "dictionary"}
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(fileobj, schema, compression=PARQUET_COMPRESSION)
+    else:
+        writer = pa.ipc.new_file(fileobj, schema, options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+    count = 0
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            arrays = []
+            for position, (column, values) in enumerate(zip(columns, zip(*chunk))):
+                if column in encoders:
+                    arrays.append(encoders[column].encode(values))
+                else:
+                    arrays.append(pa.array(values, type=schema.field(position).type))
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            count += len(chunk)
+    finally:
+        writer.close()
+    return count
+
+
+def write_vendors(fmt: str, fileobj: Union[str, BinaryIO], db_handler: DatabaseHandler, chunk_size: int = 5000) -> int:
+    """Export the vendors table (name, category)"""
+    count = write_table(fmt, fileobj, list(VENDOR_COLUMN_TYPES), VENDOR_COLUMN_TYPES,
+                        db_handler.iter_vendor_rows(chunk_size=chunk_size))
+    logger.info(f"Exported {count} vendors as {fmt}")
+    return count
+
+
+def import_parquet(
+    source: Union[str, BinaryIO],
+    db_handler: DatabaseHandler,
+    batch_size: int = PARQUET_IMPORT_BATCH_SIZE
+) -> Dict:
+    """Bulk-load a bills or vendors Parquet file written by this module.
+
+    The file kind is detected from its columns. Bills are saved through
+    ``add_bills_bulk`` one batch per transaction, so vendors, rollups and
+    the search index are kept up to date. Rows missing a vendor, amount
+    or date are skipped; rows that fail validation (e.g. a non-positive
+    amount) are counted as failed with their error under their row number.
+    """
+    _, pq = _pyarrow()
+    parquet_file = pq.ParquetFile(source)
+    names = set(parquet_file.schema_arrow.names)
+    report = {"kind": None, "rows": 0, "imported": 0, "skipped": 0, "failed": 0, "errors": {}}
+
+    if {"Vendor", "Amount", "Date"} <= names:
+        report["kind"] = "bills"
+        wanted = [c for c in BILL_COLUMN_TYPES if c in names]
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=wanted):
+            records = []
+            for row in batch.to_pylist():
+                report["rows"] += 1
+                if not row.get("Vendor") or row.get("Amount") is None or row.get("Date") is None:
+                    report["skipped"] += 1
+                    continue
+                try:
+                    VendorBase(name=row["Vendor"].strip(), category=row.get("Category"))
+                    BillEntryBase(vendor_id=0, amount=row["Amount"], transaction_date=row["Date"])
+                except ValueError as e:
+                    report["failed"] += 1
+                    report["errors"][report["rows"]] = str(e)
+                    continue
+                records.append({
+                    "vendor": {"name": row["Vendor"].strip(), "category": row.get("Category")},
+                    "bill": {
+                        "amount": row["Amount"],
+                        "transaction_date": row["Date"],
+                        "description": row.get("Description"),
+                        "file_reference": row.get("File Reference"),
+                    },
+                })
+            if records:
+                report["imported"] += len(db_handler.add_bills_bulk(records))
+    elif "Name" in names:
+        report["kind"] = "vendors"
+        wanted = [c for c in VENDOR_COLUMN_TYPES if c in names]
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=wanted):
+            rows = batch.to_pylist()
+            vendors = [{"name": r["Name"].strip(), "category": r.get("Category")} for r in rows if r.get("Name")]
+            report["rows"] += len(rows)
+            report["skipped"] += len(rows) - len(vendors)
+            report["imported"] += db_handler.add_vendors_batch(vendors)
+    else:
+        raise ValueError(f"Not a bills or vendors export: columns {sorted(names)}")
+
+    logger.info(f"Imported {report['imported']} of {report['rows']} {report['kind']} rows from Parquet")
+    return report
@@ -0,0 +1,61 @@
+import os
+import re
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from models import CategoryEnum
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("CLASSIFIER_MIN_CONFIDENCE", "0.6"))
+
+
+class CategoryClassifier:
+    """Keyword category classifier compiled into one alternation regex.
+
+    All keywords from every category are compiled once into a single
+    word-bounded pattern (longest first, so "gas station" wins over "gas"),
+    and the text is scanned once to score every category.
+    """
+
+    def __init__(self, vendor_keywords: Dict[CategoryEnum, List[str]], min_confidence: float = CLASSIFIER_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self._categories: Dict[str, List[CategoryEnum]] = {}
+        for category, keywords in vendor_keywords.items():
+            for keyword in keywords:
+                self._categories.setdefault(keyword.lower(), []).append(category)
+        alternation = "|".join(re.escape(k) for k in sorted(self._categories, key=len, reverse=True))
+        self._pattern = re.compile(r"(?<!\w)(?:" + alternation + r")(?!\w)", re.IGNORECASE)
+
+    def scores(self, text: str) -> Counter:
+        """Keyword hit counts per category; keywords shared by several categories count for each."""
+        counts: Counter = Counter()
+        for match in self._pattern.finditer(text):
+            for category in self._categories[match.group(0).lower()]:
+                counts[category] += 1
+        return counts
+
+    def classify(self, text: str) -> Tuple[Optional[CategoryEnum], float]:
+        """Return the best category and a confidence in [0, 1].
+
+        Confidence is the category's share of all keyword hits, discounted
+        when there are only a few hits (one hit alone gives at most 0.5).
+        """
+        counts = self.scores(text)
+        if not counts:
+            return None, 0.0
+        (best, hits), = counts.most_common(1)
+        share = hits / sum(counts.values())
+        return best, round(share * (1 - 0.5 ** hits), 2)
+
+    def classify_many(self, texts: Iterable[str]) -> List[Tuple[Optional[CategoryEnum], float]]:
+        return [self.classify(text) for text in texts]
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= self.min_confidence
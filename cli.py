@@ -0,0 +1,200 @@
+import os
+import argparse
+import json
+import logging
+import sys
+from datetime import date, datetime
+
+from db_handler import DatabaseHandler
+from service_layer import ReceiptProcessor, INGEST_WORKERS, INGEST_LLM_CONCURRENCY, INGEST_BATCH_SIZE
+from job_queue import JOB_WORKERS
+from export_engine import ExportEngine, EXPORT_FORMATS
+from arrow_io import ARROW_FORMATS, PARQUET_IMPORT_BATCH_SIZE, import_parquet
+from vendor_resolver import VendorResolver, VENDOR_MATCH_THRESHOLD
+from text_extraction import benchmark_preprocessing
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def cmd_ingest(args: argparse.Namespace) -> int:
+    processor = ReceiptProcessor()
+    report = processor.ingest_batch(
+        args.source,
+        workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        batch_size=args.batch_size
+    )
+    for entry in report["files"]:
+        detail = f"bill #{entry['bill_id']}" if entry["status"] == "saved" else f"{entry.get('stage')}: {entry.get('error')}"
+        print(f"{entry['status']:>7}  {entry['file']}  ({detail})")
+    timings = report["timings"]
+    print(
+        f"\n{report['saved']}/{report['total']} saved, {report['failed']} failed "
+        f"in {report['elapsed_seconds']:.1f}s ({report['files_per_second']:.2f} files/s; "
+        f"extract {timings['extract']:.1f}s, parse {timings['parse']:.1f}s, save {timings['save']:.1f}s)"
+    )
+    if args.report:
+        with open(args.report, "w") as fh:
+            json.dump(report, fh, indent=2, default=str)
+    return 0 if report["failed"] == 0 else 1
+
+
+def cmd_rebuild_rollups(args: argparse.Namespace) -> int:
+    DatabaseHandler().rebuild_rollups()
+    print("Spending rollups rebuilt")
+    return 0
+
+
+def _format_from_path(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, spec in EXPORT_FORMATS.items():
+        if spec["extension"] == extension:
+            return fmt
+    raise SystemExit(f"Cannot infer export format from {path!r}; pass --format")
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    fmt = args.format or _format_from_path(args.path)
+    exporter = ExportEngine(DatabaseHandler())
+    with open(args.path, "wb") as fh:
+        if args.dataset == "vendors":
+            if fmt not in ARROW_FORMATS:
+                raise SystemExit("Vendor exports support only parquet and arrow")
+            count = exporter.write_vendors(fmt, fh)
+        else:
+            count = exporter.write(
+                fmt, fh,
+                start_date=args.start_date,
+                end_date=args.end_date,
+                category=args.category
+            )
+    print(f"Exported {count} {args.dataset} to {args.path}")
+    return 0
+
+
+def cmd_import_parquet(args: argparse.Namespace) -> int:
+    report = import_parquet(args.path, DatabaseHandler(), batch_size=args.batch_size)
+    for row, error in report["errors"].items():
+        print(f"failed  row {row}: {error}")
+    print(
+        f"Imported {report['imported']}/{report['rows']} {report['kind']} rows "
+        f"({report['skipped']} skipped, {report['failed']} failed)"
+    )
+    return 0 if report["failed"] == 0 else 1
+
+
+def cmd_dedupe_vendors(args: argparse.Namespace) -> int:
+    resolver = VendorResolver(DatabaseHandler(), threshold=args.threshold)
+    merges = resolver.dedupe(dry_run=args.dry_run)
+    for merge in merges:
+        moved = "" if args.dry_run else f" ({merge['bills_moved']} bills moved)"
+        print(f"{merge['target']!r} <- {', '.join(repr(name) for name in merge['merged'])}{moved}")
+    print(f"{len(merges)} duplicate groups {'found' if args.dry_run else 'merged'}")
+    return 0
+
+
+def cmd_reprocess(args: argparse.Namespace) -> int:
+    report = ReceiptProcessor().reprocess_bills(args.bill_ids or None, llm_concurrency=args.llm_concurrency)
+    for bill_id, error in report["errors"].items():
+        print(f"failed  bill #{bill_id}: {error}")
+    print(f"{report['updated']}/{report['total']} bills re-parsed from stored text, {report['failed']} failed")
+    return 0 if report["failed"] == 0 else 1
+
+
+def cmd_worker(args: argparse.Namespace) -> int:
+    processor = ReceiptProcessor()
+    processor.jobs.workers = args.workers
+    processor.jobs.run_forever()
+    return 0
+
+
+def cmd_jobs(args: argparse.Namespace) -> int:
+    for job in ReceiptProcessor().list_jobs(limit=args.limit):
+        created = datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+        detail = job["error"] or job["label"] or ""
+        print(f"{job['id'][:8]}  {created}  {job['status']:>9}  {job['kind']:<16} {detail}")
+    return 0
+
+
+def _target_height(value: str):
+    return None if value == "off" else int(value)
+
+
+def cmd_bench_ocr(args: argparse.Namespace) -> int:
+    results = benchmark_preprocessing(args.directory, args.heights)
+    print(f"{'target':>8} {'MP':>6} {'prep ms':>9} {'ocr ms':>9} {'accuracy':>9}")
+    for row in results:
+        target = "off" if row["target_text_height"] is None else row["target_text_height"]
+        accuracy = "-" if row["accuracy"] is None else f"{row['accuracy']:.3f}"
+        print(
+            f"{target:>8} {row['megapixels']:>6.2f} {row['preprocess_ms']:>9.1f} "
+            f"{row['ocr_ms']:>9.1f} {accuracy:>9}"
+        )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Receipt Manager command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest = subparsers.add_parser("ingest", help="Bulk-ingest a directory or zip archive of receipts")
+    ingest.add_argument("source", help="Directory or .zip file containing receipts")
+    ingest.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Text extraction processes")
+    ingest.add_argument("--llm-concurrency", type=int, default=INGEST_LLM_CONCURRENCY, help="Concurrent LLM requests")
+    ingest.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Receipts saved per transaction")
+    ingest.add_argument("--report", help="Write the full JSON report to this path")
+    ingest.set_defaults(func=cmd_ingest)
+
+    rollups = subparsers.add_parser("rebuild-rollups", help="Recompute daily/monthly spending rollups from bills")
+    rollups.set_defaults(func=cmd_rebuild_rollups)
+
+    export = subparsers.add_parser("export", help="Export bills or vendors (csv, ndjson, xlsx, parquet, arrow)")
+    export.add_argument("path", help="Output file; the format is inferred from the extension")
+    export.add_argument("--format", choices=sorted(EXPORT_FORMATS), help="Override the inferred format")
+    export.add_argument("--dataset", choices=["bills", "vendors"], default="bills")
+    export.add_argument("--start-date", type=date.fromisoformat, help="YYYY-MM-DD")
+    export.add_argument("--end-date", type=date.fromisoformat, help="YYYY-MM-DD")
+    export.add_argument("--category", help="Only bills from vendors in this category")
+    export.set_defaults(func=cmd_export)
+
+    parquet_import = subparsers.add_parser("import-parquet", help="Bulk-load a bills or vendors Parquet export")
+    parquet_import.add_argument("path", help="Parquet file written by the export command")
+    parquet_import.add_argument("--batch-size", type=int, default=PARQUET_IMPORT_BATCH_SIZE,
+                                help="Rows saved per transaction")
+    parquet_import.set_defaults(func=cmd_import_parquet)
+
+    dedupe = subparsers.add_parser("dedupe-vendors", help="Merge vendors whose names are variants of each other")
+    dedupe.add_argument("--threshold", type=float, default=VENDOR_MATCH_THRESHOLD, help="Similarity needed to merge (0-1)")
+    dedupe.add_argument("--dry-run", action="store_true", help="Only list the groups that would be merged")
+    dedupe.set_defaults(func=cmd_dedupe_vendors)
+
+    reprocess = subparsers.add_parser("reprocess", help="Re-parse bills from their stored receipt text without OCR")
+    reprocess.add_argument("bill_ids", nargs="*", type=int, help="Bills to reprocess (default: all with stored text)")
+    reprocess.add_argument("--llm-concurrency", type=int, default=INGEST_LLM_CONCURRENCY, help="Concurrent LLM requests")
+    reprocess.set_defaults(func=cmd_reprocess)
+
+    worker = subparsers.add_parser("worker", help="Run background job workers (uploads, ingest, maintenance)")
+    worker.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1), help="Worker threads")
+    worker.set_defaults(func=cmd_worker)
+
+    jobs = subparsers.add_parser("jobs", help="List recent background jobs")
+    jobs.add_argument("--limit", type=int, default=20)
+    jobs.set_defaults(func=cmd_jobs)
+
+    bench = subparsers.add_parser("bench-ocr", help="OCR latency vs accuracy at several preprocessing sizes")
+    bench.add_argument("directory", help="Receipt images, each optionally with a same-named .txt transcript")
+    bench.add_argument("--heights", nargs="+", type=_target_height, default=[None, 48, 32, 24, 16],
+                       help="Target text heights in pixels; 'off' runs OCR on the original image")
+    bench.set_defaults(func=cmd_bench_ocr)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
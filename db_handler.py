@@ -1,27 +1,194 @@
-from sqlalchemy import exc, func, or_
+from sqlalchemy import exc, func, or_, and_, select, delete, update, bindparam, inspect
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from typing import List, Optional, Tuple, Dict, Generator
+from typing import List, Optional, Tuple, Dict, Generator, Sequence, Iterator, Iterable
 from datetime import date
+from collections import defaultdict
 import logging
-from models import Base, DBVendor, DBBillEntry, SessionLocal, engine, CategoryEnum
+from models import Base, DBVendor, DBBillEntry, DBDailySpending, DBMonthlySpending, DBReceiptText, SessionLocal, engine, vendor_name_key
+from receipt_texts import compress_pages, decompress_pages
 from sqlalchemy.orm import Session
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.schema import CreateIndex
+from search_index import ensure_search_index, rebuild_search_index, build_fts_query, match_query
+import os
+import threading
+import base64
+import json
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "5000"))
+VENDOR_LOOKUP_CHUNK_SIZE = 500
+
+BILL_SORT_KEYS = {
+    "date": DBBillEntry.transaction_date,
+    "amount": DBBillEntry.amount,
+    "vendor": DBVendor.name_key,
+    "category": func.coalesce(DBVendor.category, ""),
+}
+
+
+def _sort_value(bill: DBBillEntry, sort: str):
+    if sort == "date":
+        return bill.transaction_date
+    if sort == "amount":
+        return bill.amount
+    if sort == "vendor":
+        return bill.vendor.name_key
+    return bill.vendor.category or ""
+
+
+def _encode_cursor(value, bill_id: int, sort: str, sort_desc: bool) -> str:
+    if isinstance(value, date):
+        value = value.isoformat()
+    payload = json.dumps({"v": value, "id": bill_id, "s": sort, "d": sort_desc})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_cursor(cursor: str, sort: str, sort_desc: bool) -> Tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid page cursor") from e
+    if payload.get("s") != sort or payload.get("d") != sort_desc:
+        raise ValueError("Page cursor does not match the requested sort order")
+    value = payload["v"]
+    if sort == "date":
+        value = date.fromisoformat(value)
+    return value, payload["id"]
+
+
+def _dialect_insert(db: Session):
+    """INSERT construct supporting ON CONFLICT for the session's backend."""
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+def _month_expr(db: Session, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
+
+def _receipt_text_row(bill_id: int, content_hash: str, pages: List[str], engine_version: str) -> Dict:
+    codec, blob = compress_pages(pages)
+    return {
+        "bill_id": bill_id,
+        "content_hash": content_hash,
+        "engine_version": engine_version,
+        "codec": codec,
+        "pages": blob,
+        "page_count": len(pages),
+        "char_count": sum(len(page) for page in pages),
+    }
+
+
+def _receipt_text_dict(row: DBReceiptText) -> Dict:
+    pages = decompress_pages(row.codec, row.pages)
+    return {
+        "bill_id": row.bill_id,
+        "content_hash": row.content_hash,
+        "engine_version": row.engine_version,
+        "pages": pages,
+        "text": "\n".join(page for page in pages if page),
+    }
+
+
+SpendingDeltas = Dict[Tuple[int, date], List]
+
+
+_schema_ready = False
+_fulltext_ready = False
+_schema_lock = threading.Lock()
+
+
 class DatabaseHandler:
     def __init__(self):
         self._create_tables()
     
     def _create_tables(self) -> None:
-        try:
-            Base.metadata.create_all(bind=engine)
-            logger.info("Database tables initialized")
-        except exc.SQLAlchemyError as e:
-            logger.error(f"Error creating tables: {e}")
-            raise
+        """Create missing tables once per process; later handlers skip the introspection."""
+        global _schema_ready, _fulltext_ready
+        if _schema_ready:
+            return
+        with _schema_lock:
+            if _schema_ready:
+                return
+            try:
+                Base.metadata.create_all(bind=engine)
+                with engine.begin() as conn:
+                    merged_vendors = self._migrate_vendor_name_key(conn)
+                    added_totals = self._migrate_vendor_totals(conn)
+                    for table in Base.metadata.sorted_tables:
+                        for index in table.indexes:
+                            conn.execute(CreateIndex(index, if_not_exists=True))
+                    _fulltext_ready = ensure_search_index(conn)
+                with SessionLocal() as db:
+                    has_bills = db.query(DBBillEntry.id).first() is not None
+                    has_rollups = db.query(DBDailySpending.day).first() is not None
+                if has_bills and (merged_vendors or added_totals or not has_rollups):
+                    self.rebuild_rollups()
+                _schema_ready = True
+                logger.info("Database tables initialized")
+            except exc.SQLAlchemyError as e:
+                logger.error(f"Error creating tables: {e}")
+                raise
+
+    @staticmethod
+    def _migrate_vendor_name_key(conn) -> bool:
+        """Add and backfill ``vendors.name_key`` on databases created before it existed.
+
+        Vendors whose names only differ in case or spacing are merged into the
+        oldest one first so the unique index can be built. Returns True when
+        any were merged (the spending rollups then need rebuilding).
+        """
+        columns = {column["name"] for column in inspect(conn).get_columns("vendors")}
+        if "name_key" in columns:
+            return False
+        conn.exec_driver_sql("ALTER TABLE vendors ADD COLUMN name_key VARCHAR(100)")
+        conn.exec_driver_sql("DROP INDEX IF EXISTS ix_vendors_name_lower")
+        vendors = DBVendor.__table__
+        keep: Dict[str, Tuple[int, Optional[str]]] = {}
+        merged = 0
+        for vendor_id, name, category in conn.execute(
+            select(vendors.c.id, vendors.c.name, vendors.c.category).order_by(vendors.c.id)
+        ).all():
+            key = vendor_name_key(name)
+            if key not in keep:
+                keep[key] = (vendor_id, category)
+                conn.execute(update(vendors).where(vendors.c.id == vendor_id).values(name_key=key))
+                continue
+            keep_id, keep_category = keep[key]
+            conn.execute(update(DBBillEntry.__table__).where(DBBillEntry.vendor_id == vendor_id).values(vendor_id=keep_id))
+            for rollup in (DBDailySpending.__table__, DBMonthlySpending.__table__):
+                conn.execute(delete(rollup).where(rollup.c.vendor_id == vendor_id))
+            if category and not keep_category:
+                conn.execute(update(vendors).where(vendors.c.id == keep_id).values(category=category))
+                keep[key] = (keep_id, category)
+            conn.execute(delete(vendors).where(vendors.c.id == vendor_id))
+            merged += 1
+        logger.info(f"Added vendors.name_key ({len(keep)} vendors, {merged} duplicates merged)")
+        return merged > 0
+
+    @staticmethod
+    def _migrate_vendor_totals(conn) -> bool:
+        """Add the cached ``total_spent``/``bill_count`` vendor columns; True when they were missing"""
+        columns = {column["name"] for column in inspect(conn).get_columns("vendors")}
+        if "cached_total_spent" in columns:
+            return False
+        conn.exec_driver_sql("ALTER TABLE vendors ADD COLUMN cached_total_spent FLOAT NOT NULL DEFAULT 0")
+        conn.exec_driver_sql("ALTER TABLE vendors ADD COLUMN bill_count INTEGER NOT NULL DEFAULT 0")
+        logger.info("Added vendors.cached_total_spent and vendors.bill_count")
+        return True
+
+    @staticmethod
+    def reset_schema_cache() -> None:
+        """Force the next DatabaseHandler to re-run table creation."""
+        global _schema_ready
+        with _schema_lock:
+            _schema_ready = False
 
     def get_db(self) -> Generator[Session, None, None]:
         db = SessionLocal()
@@ -41,7 +208,7 @@ class DatabaseHandler:
                 if vendor_data.get("category") and not isinstance(vendor_data["category"], str):
                     vendor_data["category"] = str(vendor_data["category"])
                 existing = db.query(DBVendor).filter(
-                    func.lower(DBVendor.name) == func.lower(vendor_data["name"])
+                    DBVendor.name_key == vendor_name_key(vendor_data["name"])
                 ).first()
                 if existing:
                     if vendor_data.get("category") and existing.category != vendor_data["category"]:
@@ -69,12 +236,123 @@ class DatabaseHandler:
                 DBVendor.name.ilike(f"%{search_term}%")
             ).all()
 
-    def add_bill(self, bill_data: Dict) -> DBBillEntry:
-        """Add bill entry with transaction"""
+    def add_vendors_batch(self, vendors: List[Dict]) -> int:
+        """Create or update ``{"name", "category"}`` vendors in one transaction; returns vendors written"""
+        with SessionLocal() as db:
+            try:
+                vendor_ids = self._resolve_vendor_ids(db, vendors)
+                db.commit()
+                return len(vendor_ids)
+            except exc.SQLAlchemyError as e:
+                db.rollback()
+                logger.error(f"Error adding vendors batch: {e}")
+                raise
+
+    def _resolve_vendor_ids(self, db: Session, vendors: Iterable[Dict]) -> Dict[str, int]:
+        """Map vendor name keys to ids, creating missing vendors with ``INSERT ... ON CONFLICT``.
+
+        A non-empty category overrides the stored one (the last record for a
+        name wins). Lookups and writes are batched, not issued per vendor.
+        """
+        wanted: Dict[str, Dict] = {}
+        for vendor_data in vendors:
+            name = vendor_data["name"].strip()
+            entry = wanted.setdefault(vendor_name_key(name), {"name": name, "name_key": vendor_name_key(name), "category": None})
+            if vendor_data.get("category"):
+                entry["category"] = str(vendor_data["category"])
+        keys = list(wanted)
+
+        def _lookup(lookup_keys: List[str]) -> Dict[str, Tuple[int, Optional[str]]]:
+            found = {}
+            for start in range(0, len(lookup_keys), VENDOR_LOOKUP_CHUNK_SIZE):
+                rows = db.execute(
+                    select(DBVendor.name_key, DBVendor.id, DBVendor.category)
+                    .where(DBVendor.name_key.in_(lookup_keys[start:start + VENDOR_LOOKUP_CHUNK_SIZE]))
+                )
+                for key, vendor_id, category in rows:
+                    found[key] = (vendor_id, category)
+            return found
+
+        existing = _lookup(keys)
+        missing = [wanted[key] for key in keys if key not in existing]
+        if missing:
+            stmt = _dialect_insert(db)(DBVendor.__table__).on_conflict_do_nothing(index_elements=["name_key"])
+            db.execute(stmt, missing)
+            existing.update(_lookup([key for key in keys if key not in existing]))
+        updates = [
+            {"vendor_id": existing[key][0], "new_category": entry["category"]}
+            for key, entry in wanted.items()
+            if entry["category"] and existing[key][1] != entry["category"]
+        ]
+        if updates:
+            db.execute(
+                update(DBVendor.__table__)
+                .where(DBVendor.__table__.c.id == bindparam("vendor_id"))
+                .values(category=bindparam("new_category")),
+                updates
+            )
+        return {key: vendor_id for key, (vendor_id, _) in existing.items()}
+
+    def add_bills_bulk(self, records: Sequence[Dict], chunk_size: int = BULK_INSERT_CHUNK_SIZE) -> List[int]:
+        """Insert ``{"vendor": ..., "bill": ...}`` records with Core bulk inserts and return bill ids in order.
+
+        Vendors are resolved or created once for the whole call; bills are
+        inserted ``chunk_size`` rows per statement and transaction, together
+        with their spending rollup updates and, for records carrying a
+        ``"text"`` entry (``content_hash``, ``pages``, ``engine_version``),
+        their stored receipt text.
+        """
+        bill_ids: List[int] = []
+        with SessionLocal() as db:
+            try:
+                vendor_ids = self._resolve_vendor_ids(db, (record["vendor"] for record in records))
+                db.commit()
+                insert_bills = DBBillEntry.__table__.insert().returning(
+                    DBBillEntry.__table__.c.id, sort_by_parameter_order=True
+                )
+                for start in range(0, len(records), chunk_size):
+                    rows = []
+                    deltas: SpendingDeltas = defaultdict(lambda: [0.0, 0])
+                    for record in records[start:start + chunk_size]:
+                        bill = record["bill"]
+                        row = {
+                            "vendor_id": vendor_ids[vendor_name_key(record["vendor"]["name"])],
+                            "amount": bill["amount"],
+                            "transaction_date": bill["transaction_date"],
+                            "description": bill.get("description"),
+                            "file_reference": bill.get("file_reference"),
+                        }
+                        rows.append(row)
+                        delta = deltas[(row["vendor_id"], row["transaction_date"])]
+                        delta[0] += row["amount"]
+                        delta[1] += 1
+                    chunk_ids = db.execute(insert_bills, rows).scalars().all()
+                    texts = [
+                        _receipt_text_row(bill_id, **record["text"])
+                        for bill_id, record in zip(chunk_ids, records[start:start + chunk_size])
+                        if record.get("text")
+                    ]
+                    if texts:
+                        db.execute(DBReceiptText.__table__.insert(), texts)
+                    bill_ids.extend(chunk_ids)
+                    self._apply_spending_deltas(db, deltas)
+                    db.commit()
+                return bill_ids
+            except exc.SQLAlchemyError as e:
+                db.rollback()
+                logger.error(f"Error bulk adding bills after {len(bill_ids)} rows: {e}")
+                raise
+
+    def add_bill(self, bill_data: Dict, text: Optional[Dict] = None) -> DBBillEntry:
+        """Add bill entry with transaction, storing its receipt ``text`` (as in ``add_bills_bulk``) in the same one"""
         with SessionLocal() as db:
             try:
                 bill = DBBillEntry(**bill_data)
                 db.add(bill)
+                db.flush()
+                if text:
+                    db.execute(DBReceiptText.__table__.insert(), [_receipt_text_row(bill.id, **text)])
+                self._apply_spending_deltas(db, {(bill.vendor_id, bill.transaction_date): [bill.amount, 1]})
                 db.commit()
                 db.refresh(bill)
                 return bill
@@ -85,6 +363,50 @@ class DatabaseHandler:
 
     
 
+    def _apply_bill_filters(
+        self,
+        query,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        vendor_id: Optional[int] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        category: Optional[str] = None,
+        vendor_query: Optional[str] = None,
+        text_query: Optional[str] = None
+    ):
+        if vendor_id:
+            query = query.filter(DBBillEntry.vendor_id == vendor_id)
+        if start_date:
+            query = query.filter(DBBillEntry.transaction_date >= start_date)
+        if end_date:
+            query = query.filter(DBBillEntry.transaction_date <= end_date)
+        if min_amount:
+            query = query.filter(DBBillEntry.amount >= min_amount)
+        if max_amount:
+            query = query.filter(DBBillEntry.amount <= max_amount)
+        if category:
+            query = query.filter(DBBillEntry.vendor_id.in_(
+                select(DBVendor.id).where(DBVendor.category == category)
+            ))
+        if vendor_query:
+            query = query.filter(DBBillEntry.vendor_id.in_(
+                select(DBVendor.id).where(DBVendor.name.ilike(f"%{vendor_query.strip()}%"))
+            ))
+        if text_query:
+            fts_query = build_fts_query(text_query)
+            if fts_query and _fulltext_ready:
+                query = query.filter(DBBillEntry.id.in_(
+                    select(match_query(fts_query).subquery().c.bill_id)
+                ))
+            elif fts_query:
+                pattern = f"%{text_query.strip()}%"
+                query = query.filter(or_(
+                    DBBillEntry.description.ilike(pattern),
+                    DBBillEntry.vendor_id.in_(select(DBVendor.id).where(DBVendor.name.ilike(pattern)))
+                ))
+        return query
+
     def get_bills(
         self,
         start_date: Optional[date] = None,
@@ -93,24 +415,115 @@ class DatabaseHandler:
         min_amount: Optional[float] = None,
         max_amount: Optional[float] = None,
         category: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        vendor_query: Optional[str] = None,
+        sort: str = "date",
+        sort_desc: bool = True,
+        text_query: Optional[str] = None
     ) -> List[DBBillEntry]:
+        if sort not in BILL_SORT_KEYS:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        sort_key = BILL_SORT_KEYS[sort]
         with SessionLocal() as db:
-            query = db.query(DBBillEntry).options(joinedload(DBBillEntry.vendor))
-            if vendor_id:
-                query = query.filter(DBBillEntry.vendor_id == vendor_id)
-            if start_date:
-                query = query.filter(DBBillEntry.transaction_date >= start_date)
-            if end_date:
-                query = query.filter(DBBillEntry.transaction_date <= end_date)
-            if min_amount:
-                query = query.filter(DBBillEntry.amount >= min_amount)
-            if max_amount:
-                query = query.filter(DBBillEntry.amount <= max_amount)
-            if category:
-                query = query.join(DBVendor).filter(DBVendor.category == category)
-            return query.order_by(DBBillEntry.transaction_date.desc()).limit(limit).all()
+            query = db.query(DBBillEntry).join(DBBillEntry.vendor).options(contains_eager(DBBillEntry.vendor))
+            query = self._apply_bill_filters(
+                query, start_date, end_date, vendor_id, min_amount, max_amount, category, vendor_query, text_query
+            )
+            order = (sort_key.desc(), DBBillEntry.id.desc()) if sort_desc else (sort_key.asc(), DBBillEntry.id.asc())
+            return query.order_by(*order).limit(limit).all()
+
+    def get_bills_page(
+        self,
+        cursor: Optional[str] = None,
+        page_size: int = 25,
+        sort: str = "date",
+        sort_desc: bool = True,
+        **filters
+    ) -> Tuple[List[DBBillEntry], Optional[str]]:
+        """Keyset-paginated bills ordered by ``(sort key, id)``.
+
+        Returns the page and an opaque cursor for the next page (None on the
+        last page). ``filters`` are the same keyword filters as ``get_bills``
+        plus ``vendor_query`` and ``text_query``. ``sort="relevance"`` orders
+        full-text matches best first and needs a ``text_query``.
+        """
+        fts_query = build_fts_query(filters.get("text_query")) if _fulltext_ready else None
+        if sort == "relevance" and not fts_query:
+            sort, sort_desc = "date", True
+        if sort != "relevance" and sort not in BILL_SORT_KEYS:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        with SessionLocal() as db:
+            if sort == "relevance":
+                ranked = match_query(fts_query).subquery()
+                sort_key, sort_desc = ranked.c.rank, False
+                query = db.query(DBBillEntry, ranked.c.rank).join(ranked, ranked.c.bill_id == DBBillEntry.id)
+                filters = {k: v for k, v in filters.items() if k != "text_query"}
+            else:
+                sort_key = BILL_SORT_KEYS[sort]
+                query = db.query(DBBillEntry)
+            query = query.join(DBBillEntry.vendor).options(contains_eager(DBBillEntry.vendor))
+            query = self._apply_bill_filters(query, **filters)
+            if cursor:
+                value, last_id = _decode_cursor(cursor, sort, sort_desc)
+                if sort_desc:
+                    query = query.filter(or_(sort_key < value, and_(sort_key == value, DBBillEntry.id < last_id)))
+                else:
+                    query = query.filter(or_(sort_key > value, and_(sort_key == value, DBBillEntry.id > last_id)))
+            order = (sort_key.desc(), DBBillEntry.id.desc()) if sort_desc else (sort_key.asc(), DBBillEntry.id.asc())
+            rows = query.order_by(*order).limit(page_size + 1).all()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            if sort == "relevance":
+                next_cursor = _encode_cursor(last[1], last[0].id, sort, sort_desc)
+            else:
+                next_cursor = _encode_cursor(_sort_value(last, sort), last.id, sort, sort_desc)
+        if sort == "relevance":
+            rows = [bill for bill, _ in rows]
+        return rows, next_cursor
 
+    def iter_bill_rows(self, chunk_size: int = 5000, **filters) -> Iterator[List[tuple]]:
+        """Stream ``(date, vendor, amount, category, description, file_reference)`` export rows,
+        newest first, in chunks of ``chunk_size``.
+
+        Uses a server-side cursor where the backend supports one, so only one
+        chunk is held in memory at a time.
+        """
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+                self._bill_export_select(**filters)
+            )
+            for partition in result.partitions():
+                yield [tuple(row) for row in partition]
+
+    def iter_vendor_rows(self, chunk_size: int = 5000) -> Iterator[List[tuple]]:
+        """Stream ``(name, category)`` for every vendor, by name, in chunks of ``chunk_size``"""
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+                select(DBVendor.name, DBVendor.category).order_by(DBVendor.name)
+            )
+            for partition in result.partitions():
+                yield [tuple(row) for row in partition]
+
+    def _bill_export_select(self, **filters):
+        query = select(
+            DBBillEntry.transaction_date,
+            DBVendor.name,
+            DBBillEntry.amount,
+            DBVendor.category,
+            DBBillEntry.description,
+            DBBillEntry.file_reference
+        ).join(DBVendor, DBBillEntry.vendor_id == DBVendor.id)
+        query = self._apply_bill_filters(query, **filters)
+        return query.order_by(DBBillEntry.transaction_date.desc(), DBBillEntry.id.desc())
+
+    def rebuild_search_index(self) -> None:
+        if not _fulltext_ready:
+            return
+        with engine.begin() as conn:
+            rebuild_search_index(conn)
 
     def update_bill(self, bill_id: int, update_data: Dict) -> Optional[DBBillEntry]:
         with SessionLocal() as db:
@@ -119,8 +532,16 @@ class DatabaseHandler:
                 if not bill:
                     return None
                 
+                deltas: SpendingDeltas = defaultdict(lambda: [0.0, 0])
+                old_delta = deltas[(bill.vendor_id, bill.transaction_date)]
+                old_delta[0] -= bill.amount
+                old_delta[1] -= 1
                 for key, value in update_data.items():
                     setattr(bill, key, value)
+                new_delta = deltas[(bill.vendor_id, bill.transaction_date)]
+                new_delta[0] += bill.amount
+                new_delta[1] += 1
+                self._apply_spending_deltas(db, deltas)
                 
                 db.commit()
                 db.refresh(bill)
@@ -137,6 +558,8 @@ class DatabaseHandler:
                 if not bill:
                     return False
                 
+                self._apply_spending_deltas(db, {(bill.vendor_id, bill.transaction_date): [-bill.amount, -1]})
+                db.execute(delete(DBReceiptText).where(DBReceiptText.bill_id == bill_id))
                 db.delete(bill)
                 db.commit()
                 return True
@@ -145,27 +568,281 @@ class DatabaseHandler:
                 logger.error(f"Error deleting bill: {e}")
                 raise
 
+    # Receipt texts
+    def save_receipt_text(self, bill_id: int, content_hash: str, pages: List[str], engine_version: str) -> None:
+        """Store (or replace) the extracted text of a bill's source file"""
+        with SessionLocal() as db:
+            try:
+                db.execute(delete(DBReceiptText).where(DBReceiptText.bill_id == bill_id))
+                db.execute(DBReceiptText.__table__.insert(), [
+                    _receipt_text_row(bill_id, content_hash, pages, engine_version)
+                ])
+                db.commit()
+            except exc.SQLAlchemyError as e:
+                db.rollback()
+                logger.error(f"Error saving receipt text: {e}")
+                raise
+
+    def get_receipt_text(self, bill_id: int) -> Optional[Dict]:
+        with SessionLocal() as db:
+            row = db.get(DBReceiptText, bill_id)
+            return _receipt_text_dict(row) if row else None
+
+    def iter_receipt_texts(self, bill_ids: Optional[Sequence[int]] = None, chunk_size: int = 500) -> Iterator[Dict]:
+        """Stored texts (``bill_id``, ``content_hash``, ``engine_version``, ``pages``, ``text``) by bill id"""
+        last_id = 0
+        with SessionLocal() as db:
+            while True:
+                query = select(DBReceiptText).where(DBReceiptText.bill_id > last_id)
+                if bill_ids is not None:
+                    query = query.where(DBReceiptText.bill_id.in_(bill_ids))
+                rows = db.scalars(query.order_by(DBReceiptText.bill_id).limit(chunk_size)).all()
+                if not rows:
+                    return
+                for row in rows:
+                    yield _receipt_text_dict(row)
+                last_id = rows[-1].bill_id
+                db.expunge_all()
+
+    # Spending rollups
+    def _apply_spending_deltas(self, db: Session, deltas: SpendingDeltas) -> None:
+        """Add ``(vendor_id, day) -> [amount, count]`` deltas to the daily and monthly rollups
+        and to the vendors' cached totals"""
+        daily, monthly = [], defaultdict(lambda: [0.0, 0])
+        per_vendor = defaultdict(lambda: [0.0, 0])
+        for (vendor_id, day), (amount, count) in deltas.items():
+            if vendor_id is None or day is None or (amount == 0 and count == 0):
+                continue
+            daily.append({"day": day, "vendor_id": vendor_id, "total": amount, "bill_count": count})
+            month_delta = monthly[(vendor_id, day.strftime("%Y-%m"))]
+            month_delta[0] += amount
+            month_delta[1] += count
+            vendor_delta = per_vendor[vendor_id]
+            vendor_delta[0] += amount
+            vendor_delta[1] += count
+        if per_vendor:
+            vendors = DBVendor.__table__
+            db.execute(
+                update(vendors)
+                .where(vendors.c.id == bindparam("vendor_id"))
+                .values(
+                    cached_total_spent=vendors.c.cached_total_spent + bindparam("amount"),
+                    bill_count=vendors.c.bill_count + bindparam("count")
+                ),
+                [
+                    {"vendor_id": vendor_id, "amount": amount, "count": count}
+                    for vendor_id, (amount, count) in per_vendor.items()
+                ]
+            )
+        monthly_rows = [
+            {"month": month, "vendor_id": vendor_id, "total": amount, "bill_count": count}
+            for (vendor_id, month), (amount, count) in monthly.items()
+        ]
+        insert = _dialect_insert(db)
+        for model, key, rows in (
+            (DBDailySpending, "day", daily),
+            (DBMonthlySpending, "month", monthly_rows)
+        ):
+            if not rows:
+                continue
+            table = model.__table__
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[key, "vendor_id"],
+                set_={
+                    "total": table.c.total + stmt.excluded.total,
+                    "bill_count": table.c.bill_count + stmt.excluded.bill_count
+                }
+            )
+            db.execute(stmt, rows)
+            if any(row["bill_count"] < 0 for row in rows):
+                db.execute(delete(table).where(table.c.bill_count <= 0))
+
+    def rebuild_rollups(self) -> None:
+        """Recompute the daily and monthly spending rollups and vendor totals from bill_entries"""
+        with SessionLocal() as db:
+            try:
+                db.execute(delete(DBDailySpending))
+                db.execute(delete(DBMonthlySpending))
+                db.execute(DBDailySpending.__table__.insert().from_select(
+                    ["day", "vendor_id", "total", "bill_count"],
+                    select(
+                        DBBillEntry.transaction_date, DBBillEntry.vendor_id,
+                        func.sum(DBBillEntry.amount), func.count(DBBillEntry.id)
+                    ).where(DBBillEntry.vendor_id.isnot(None)).group_by(
+                        DBBillEntry.transaction_date, DBBillEntry.vendor_id
+                    )
+                ))
+                month = _month_expr(db, DBDailySpending.day)
+                db.execute(DBMonthlySpending.__table__.insert().from_select(
+                    ["month", "vendor_id", "total", "bill_count"],
+                    select(
+                        month, DBDailySpending.vendor_id,
+                        func.sum(DBDailySpending.total), func.sum(DBDailySpending.bill_count)
+                    ).group_by(month, DBDailySpending.vendor_id)
+                ))
+                def vendor_sum(column):
+                    return select(func.coalesce(func.sum(column), 0)).where(
+                        DBDailySpending.vendor_id == DBVendor.id
+                    ).scalar_subquery()
+                db.execute(update(DBVendor.__table__).values(
+                    cached_total_spent=vendor_sum(DBDailySpending.total),
+                    bill_count=vendor_sum(DBDailySpending.bill_count)
+                ))
+                db.commit()
+                logger.info("Spending rollups rebuilt")
+            except exc.SQLAlchemyError as e:
+                db.rollback()
+                logger.error(f"Error rebuilding rollups: {e}")
+                raise
+
     # Analytics Operations
+    def get_bill_statistics(self, percentiles: Sequence[float] = (0.25, 0.5, 0.75, 0.9), **filters) -> Dict:
+        """Count, sum, min, max, mean, median, mode and percentiles of bill amounts, computed in SQL.
+
+        ``filters`` are the keyword filters accepted by ``get_bills``.
+        Percentiles use linear interpolation, matching ``statistics.median``.
+        """
+        with SessionLocal() as db:
+            base = self._apply_bill_filters(db.query(DBBillEntry.amount), **filters)
+            count, total, minimum, maximum, mean = base.with_entities(
+                func.count(DBBillEntry.id),
+                func.sum(DBBillEntry.amount),
+                func.min(DBBillEntry.amount),
+                func.max(DBBillEntry.amount),
+                func.avg(DBBillEntry.amount)
+            ).one()
+            if not count:
+                return {}
+
+            ordered = base.order_by(DBBillEntry.amount)
+            quantiles = {}
+            for p in sorted(set(percentiles) | {0.5}):
+                position = p * (count - 1)
+                lower = int(position)
+                values = [row[0] for row in ordered.offset(lower).limit(2).all()]
+                upper_value = values[1] if len(values) > 1 else values[0]
+                quantiles[p] = values[0] + (upper_value - values[0]) * (position - lower)
+
+            mode = base.with_entities(
+                DBBillEntry.amount, func.count(DBBillEntry.id).label("occurrences")
+            ).group_by(DBBillEntry.amount).order_by(
+                func.count(DBBillEntry.id).desc(), DBBillEntry.amount
+            ).limit(1).scalar()
+
+        return {
+            "count": count,
+            "total": float(total),
+            "min": float(minimum),
+            "max": float(maximum),
+            "average": float(mean),
+            "median": quantiles[0.5],
+            "mode": float(mode),
+            "percentiles": {f"p{round(p * 100)}": value for p, value in quantiles.items() if p in percentiles}
+        }
+
     def get_spending_by_category(self, start_date: date, end_date: date) -> List[Tuple[str, float]]:
         with SessionLocal() as db:
             return db.query(
                 DBVendor.category,
-                func.sum(DBBillEntry.amount).label('total')
-            ).join(DBBillEntry).filter(
-                DBBillEntry.transaction_date.between(start_date, end_date)
+                func.sum(DBDailySpending.total).label('total')
+            ).join(DBDailySpending, DBDailySpending.vendor_id == DBVendor.id).filter(
+                DBDailySpending.day.between(start_date, end_date)
             ).group_by(DBVendor.category).all()
 
     def get_monthly_spending(self) -> List[Tuple[str, float]]:
         with SessionLocal() as db:
             return db.query(
-                func.strftime("%Y-%m", DBBillEntry.transaction_date).label('month'),
-                func.sum(DBBillEntry.amount).label('total')
-            ).group_by('month').order_by('month').all()
+                DBMonthlySpending.month,
+                func.sum(DBMonthlySpending.total).label('total')
+            ).group_by(DBMonthlySpending.month).order_by(DBMonthlySpending.month).all()
+
+    def get_daily_spending(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Tuple[date, float]]:
+        with SessionLocal() as db:
+            query = db.query(
+                DBDailySpending.day,
+                func.sum(DBDailySpending.total).label('total')
+            )
+            if start_date:
+                query = query.filter(DBDailySpending.day >= start_date)
+            if end_date:
+                query = query.filter(DBDailySpending.day <= end_date)
+            return query.group_by(DBDailySpending.day).order_by(DBDailySpending.day).all()
+
+    def get_vendor_spending(self, limit: int = 20, order_by: str = "total") -> List[Tuple[str, float, int]]:
+        """(vendor, total spent, bill count) for the top vendors by ``total`` or ``bill_count``.
+
+        Reads the cached vendor totals, so the ranking is an index scan.
+        """
+        with SessionLocal() as db:
+            key = DBVendor.bill_count if order_by == "bill_count" else DBVendor.cached_total_spent
+            return db.query(
+                DBVendor.name,
+                DBVendor.cached_total_spent,
+                DBVendor.bill_count
+            ).filter(DBVendor.bill_count > 0).order_by(key.desc()).limit(limit).all()
+
+    def get_vendor_names(self, with_bill_counts: bool = False) -> List[Tuple]:
+        """``(id, name, category)`` (plus the cached bill count) for every vendor, oldest first"""
+        columns = [DBVendor.id, DBVendor.name, DBVendor.category] + ([DBVendor.bill_count] if with_bill_counts else [])
+        with SessionLocal() as db:
+            return [tuple(row) for row in db.execute(select(*columns).order_by(DBVendor.id))]
+
+    def merge_vendors(self, target_id: int, source_ids: Sequence[int]) -> int:
+        """Move every bill from ``source_ids`` to ``target_id`` and delete the source vendors.
+
+        Rollups and cached vendor totals are moved along with the bills, and
+        the target keeps its category (or takes a source's if it has none).
+        Returns the number of bills moved.
+        """
+        source_ids = [vendor_id for vendor_id in source_ids if vendor_id != target_id]
+        if not source_ids:
+            return 0
+        with SessionLocal() as db:
+            try:
+                target = db.get(DBVendor, target_id)
+                if target is None:
+                    raise ValueError(f"Vendor {target_id} not found")
+                deltas: SpendingDeltas = defaultdict(lambda: [0.0, 0])
+                for vendor_id, day, total, count in db.execute(
+                    select(DBDailySpending.vendor_id, DBDailySpending.day, DBDailySpending.total,
+                           DBDailySpending.bill_count).where(DBDailySpending.vendor_id.in_(source_ids))
+                ):
+                    deltas[(vendor_id, day)] = [-total, -count]
+                    target_delta = deltas[(target_id, day)]
+                    target_delta[0] += total
+                    target_delta[1] += count
+                moved = db.execute(
+                    update(DBBillEntry.__table__)
+                    .where(DBBillEntry.vendor_id.in_(source_ids))
+                    .values(vendor_id=target_id)
+                ).rowcount
+                self._apply_spending_deltas(db, deltas)
+                if not target.category:
+                    target.category = db.scalar(
+                        select(DBVendor.category)
+                        .where(DBVendor.id.in_(source_ids), DBVendor.category.isnot(None))
+                        .limit(1)
+                    )
+                for rollup in (DBDailySpending, DBMonthlySpending):
+                    db.execute(delete(rollup).where(rollup.vendor_id.in_(source_ids)))
+                db.execute(delete(DBVendor).where(DBVendor.id.in_(source_ids)))
+                db.commit()
+                logger.info(f"Merged vendors {source_ids} into {target_id} ({moved} bills)")
+                return moved
+            except exc.SQLAlchemyError as e:
+                db.rollback()
+                logger.error(f"Error merging vendors: {e}")
+                raise
 
     def get_vendor_by_name(self, vendor_name: str) -> Optional[DBVendor]:
         with SessionLocal() as db:
             return db.query(DBVendor).filter(
-                func.lower(DBVendor.name) == func.lower(vendor_name.strip())
+                DBVendor.name_key == vendor_name_key(vendor_name)
             ).first()
 
     def create_vendor(self, vendor_name: str) -> DBVendor:
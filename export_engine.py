@@ -0,0 +1,154 @@
+import io
+import os
+import csv
+import json
+import logging
+import tempfile
+from datetime import date
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import xlsxwriter
+from dotenv import load_dotenv
+
+from db_handler import DatabaseHandler
+from arrow_io import ARROW_FORMATS, BILL_COLUMN_TYPES, write_table, write_vendors
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+EXPORT_COLUMNS = ["Date", "Vendor", "Amount", "Category", "Description"]
+# Every column the export query returns; Parquet/Arrow exports include all of them by default.
+ALL_EXPORT_COLUMNS = EXPORT_COLUMNS + ["File Reference"]
+EXPORT_FORMATS = {
+    "csv": {"mime": "text/csv", "extension": ".csv"},
+    "ndjson": {"mime": "application/x-ndjson", "extension": ".jsonl"},
+    "xlsx": {"mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "extension": ".xlsx"},
+    "parquet": {"mime": "application/vnd.apache.parquet", "extension": ".parquet"},
+    "arrow": {"mime": "application/vnd.apache.arrow.file", "extension": ".arrow"},
+}
+# Formats that are only valid once complete and must be spooled before streaming.
+_SPOOLED_FORMATS = ("xlsx",) + ARROW_FORMATS
+_STREAM_BLOCK_SIZE = 1024 * 1024
+
+
+class ExportEngine:
+    """Chunked bill export to CSV, NDJSON, xlsx, Parquet and Arrow IPC.
+
+    Rows are read from the database ``chunk_size`` at a time (server-side
+    cursor where the backend supports one) and written out as they arrive,
+    so memory use does not grow with the size of the export.
+    """
+
+    def __init__(self, db_handler: DatabaseHandler, chunk_size: int = EXPORT_CHUNK_SIZE):
+        self.db_handler = db_handler
+        self.chunk_size = chunk_size
+
+    def _chunks(self, columns: Sequence[str], chunk_size: Optional[int] = None, **filters) -> Iterator[List[tuple]]:
+        indexes = [ALL_EXPORT_COLUMNS.index(c) for c in columns]
+        for chunk in self.db_handler.iter_bill_rows(chunk_size=chunk_size or self.chunk_size, **filters):
+            yield [tuple(row[i] for i in indexes) for row in chunk]
+
+    def _resolve_columns(self, fmt: str, columns: Optional[Sequence[str]]) -> List[str]:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        if not columns:
+            columns = ALL_EXPORT_COLUMNS if fmt in ARROW_FORMATS else EXPORT_COLUMNS
+        columns = list(columns)
+        unknown = set(columns) - set(ALL_EXPORT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown export columns: {sorted(unknown)}")
+        return columns
+
+    def preview(self, limit: int = 20, columns: Optional[Sequence[str]] = None, **filters) -> pd.DataFrame:
+        """First ``limit`` rows of the export, read with a single fetch"""
+        columns = self._resolve_columns("csv", columns)
+        chunks = self._chunks(columns, chunk_size=limit, **filters)
+        try:
+            rows = next(chunks, [])
+        finally:
+            chunks.close()
+        return pd.DataFrame(rows, columns=columns)
+
+    def write(self, fmt: str, fileobj: BinaryIO, columns: Optional[Sequence[str]] = None, **filters) -> int:
+        """Write the export to a binary file object and return the number of rows written"""
+        columns = self._resolve_columns(fmt, columns)
+        chunks = self._chunks(columns, **filters)
+        if fmt == "xlsx":
+            count = self._write_xlsx(fileobj, columns, chunks)
+        elif fmt in ARROW_FORMATS:
+            count = write_table(fmt, fileobj, columns, BILL_COLUMN_TYPES, chunks)
+        else:
+            count = 0
+            for block, rows in self._text_blocks(fmt, columns, chunks):
+                fileobj.write(block)
+                count += rows
+        logger.info(f"Exported {count} rows as {fmt}")
+        return count
+
+    def stream(self, fmt: str, columns: Optional[Sequence[str]] = None, **filters) -> Iterator[bytes]:
+        """Yield the export as byte blocks, e.g. for an HTTP streaming response"""
+        columns = self._resolve_columns(fmt, columns)
+        if fmt in _SPOOLED_FORMATS:
+            # xlsx (a zip archive) and Parquet/Arrow (footer-indexed) are only valid once complete,
+            # so spool them to disk first.
+            with tempfile.TemporaryFile() as spool:
+                self.write(fmt, spool, columns=columns, **filters)
+                spool.seek(0)
+                for block in iter(lambda: spool.read(_STREAM_BLOCK_SIZE), b""):
+                    yield block
+            return
+        for block, _ in self._text_blocks(fmt, columns, self._chunks(columns, **filters)):
+            yield block
+
+    def write_vendors(self, fmt: str, fileobj: BinaryIO) -> int:
+        """Write the vendors table as Parquet or Arrow IPC"""
+        return write_vendors(fmt, fileobj, self.db_handler, chunk_size=self.chunk_size)
+
+    def _text_blocks(self, fmt: str, columns: List[str], chunks: Iterator[List[tuple]]) -> Iterator[Tuple[bytes, int]]:
+        """``(encoded block, row count)`` per chunk for the line-oriented formats"""
+        if fmt == "csv":
+            yield _csv_block([columns]), 0
+            for chunk in chunks:
+                yield _csv_block(chunk), len(chunk)
+        else:
+            for chunk in chunks:
+                yield _ndjson_block(chunk, columns), len(chunk)
+
+    def _write_xlsx(self, fileobj: BinaryIO, columns: List[str], chunks: Iterator[List[tuple]]) -> int:
+        workbook = xlsxwriter.Workbook(fileobj, {"constant_memory": True})
+        try:
+            sheet = workbook.add_worksheet("Receipts")
+            date_format = workbook.add_format({"num_format": "yyyy-mm-dd"})
+            sheet.write_row(0, 0, columns)
+            count = 0
+            for chunk in chunks:
+                for row in chunk:
+                    count += 1
+                    for col, value in enumerate(row):
+                        if isinstance(value, date):
+                            sheet.write_datetime(count, col, value, date_format)
+                        else:
+                            sheet.write(count, col, value)
+        finally:
+            workbook.close()
+        return count
+
+
+def _csv_block(rows: List[tuple]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_block(rows: List[tuple], columns: List[str]) -> bytes:
+    return "".join(
+        json.dumps(
+            {c: v.isoformat() if isinstance(v, date) else v for c, v in zip(columns, row)},
+            ensure_ascii=False
+        ) + "\n"
+        for row in rows
+    ).encode("utf-8")
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", "extraction_cache.db")
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+
+
+def content_hash(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+class ExtractionCache:
+    """Persistent LRU cache of OCR text and parsed receipt fields, keyed by file content hash."""
+
+    def __init__(self, path: str = EXTRACTION_CACHE_PATH, max_entries: int = EXTRACTION_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS extractions (
+                    content_hash TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    parsed TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_extractions_last_access ON extractions (last_access)")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(extractions)")}
+            if "pages" not in columns:
+                conn.execute("ALTER TABLE extractions ADD COLUMN pages TEXT")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT text, parsed, pages FROM extractions WHERE content_hash = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE extractions SET last_access = ? WHERE content_hash = ?", (time.time(), key)
+                )
+            return {
+                "text": row[0],
+                "parsed": json.loads(row[1]),
+                "pages": json.loads(row[2]) if row[2] else [row[0]]
+            }
+        except sqlite3.Error as e:
+            logger.warning(f"Extraction cache read failed: {e}")
+            return None
+
+    def put(self, key: str, text: str, parsed: Dict, pages: Optional[List[str]] = None) -> None:
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO extractions (content_hash, text, parsed, pages, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, text, json.dumps(parsed, default=str), json.dumps(pages) if pages else None, now, now)
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Extraction cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (count,) = conn.execute("SELECT COUNT(*) FROM extractions").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM extractions WHERE content_hash IN ("
+                "SELECT content_hash FROM extractions ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def invalidate(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM extractions WHERE content_hash = ?", (key,))
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM extractions")
@@ -0,0 +1,185 @@
+import os
+import logging
+from io import BytesIO
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "true").lower() in ("1", "true", "yes")
+OCR_TARGET_TEXT_HEIGHT = int(os.getenv("OCR_TARGET_TEXT_HEIGHT", "32"))
+OCR_MAX_IMAGE_SIDE = int(os.getenv("OCR_MAX_IMAGE_SIDE", "2560"))
+PREPROCESS_VERSION = "prep1"
+
+# Layout analysis (crop, skew, text height) runs on a thumbnail this size.
+ANALYSIS_SIDE = 1000
+MAX_SKEW_DEGREES = 10.0
+SKEW_STEP_DEGREES = 0.5
+MAX_SKEW_SAMPLES = 20000
+
+
+def load_image(file_bytes: bytes, max_side: int = OCR_MAX_IMAGE_SIDE) -> Image.Image:
+    """Decode an image upright (EXIF orientation applied) and in grayscale.
+
+    JPEGs are decoded at a reduced DCT scale when they are much larger than
+    ``max_side``, so a 12 MP photo is never fully decoded.
+    """
+    image = Image.open(BytesIO(file_bytes))
+    if max_side and max(image.size) > 2 * max_side:
+        image.draft("L", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    return image if image.mode == "L" else image.convert("L")
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Otsu's threshold of a uint8 image (vectorized over the 256-bin histogram)."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weights = np.cumsum(hist)
+    means = np.cumsum(hist * np.arange(256))
+    total, total_mean = weights[-1], means[-1]
+    background = weights[:-1]
+    foreground = total - background
+    valid = (background > 0) & (foreground > 0)
+    between = np.zeros(255)
+    between[valid] = (
+        (total_mean * background[valid] - means[:-1][valid] * total) ** 2
+        / (background[valid] * foreground[valid])
+    )
+    return int(np.argmax(between))
+
+
+def receipt_bbox(gray: np.ndarray, threshold: int) -> Optional[Tuple[int, int, int, int]]:
+    """Bounding box ``(left, top, right, bottom)`` of the bright paper against a darker background.
+
+    Rows and columns that are mostly paper are kept, plus a 2% margin;
+    returns None when the paper fills (nearly) the whole frame or no clear
+    region is found.
+    """
+    paper = gray > threshold
+    rows = np.flatnonzero(paper.mean(axis=1) > 0.3)
+    cols = np.flatnonzero(paper.mean(axis=0) > 0.3)
+    if rows.size == 0 or cols.size == 0:
+        return None
+    height, width = gray.shape
+    pad_y, pad_x = height // 50, width // 50
+    top, bottom = max(0, rows[0] - pad_y), min(height, rows[-1] + 1 + pad_y)
+    left, right = max(0, cols[0] - pad_x), min(width, cols[-1] + 1 + pad_x)
+    area = (bottom - top) * (right - left) / (height * width)
+    if area > 0.95 or area < 0.1:
+        return None
+    return int(left), int(top), int(right), int(bottom)
+
+
+def ink_mask(gray: np.ndarray, threshold: int) -> np.ndarray:
+    """Dark pixels lying between the first and last paper pixel of their row.
+
+    Excludes background showing around a tilted or loosely cropped receipt,
+    which would otherwise look like one huge block of ink.
+    """
+    paper = gray > threshold
+    first = np.argmax(paper, axis=1)
+    last = paper.shape[1] - 1 - np.argmax(paper[:, ::-1], axis=1)
+    cols = np.arange(paper.shape[1])
+    inside = (cols >= first[:, None]) & (cols <= last[:, None]) & paper.any(axis=1)[:, None]
+    return ~paper & inside
+
+
+def skew_angle(ink: np.ndarray) -> float:
+    """Text skew in degrees from the projection profile of ink pixels.
+
+    Ink coordinates are projected onto the rotated y axis for every
+    candidate angle at once; the angle whose row histogram is sharpest
+    (highest variance) is the one that lines the text up horizontally.
+    """
+    ys, xs = np.nonzero(ink)
+    if ys.size < 100:
+        return 0.0
+    if ys.size > MAX_SKEW_SAMPLES:
+        pick = np.random.default_rng(0).choice(ys.size, MAX_SKEW_SAMPLES, replace=False)
+        ys, xs = ys[pick], xs[pick]
+    angles = np.deg2rad(np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + SKEW_STEP_DEGREES, SKEW_STEP_DEGREES))
+    projected = (ys[None, :] * np.cos(angles)[:, None] - xs[None, :] * np.sin(angles)[:, None]).astype(np.int64)
+    projected -= projected.min(axis=1, keepdims=True)
+    bins = int(projected.max()) + 1
+    offsets = (np.arange(len(angles)) * bins)[:, None]
+    hist = np.bincount((projected + offsets).ravel(), minlength=len(angles) * bins).reshape(len(angles), bins)
+    best = int(np.argmax(hist.var(axis=1)))
+    return float(np.rad2deg(angles[best]))
+
+
+def text_height(ink: np.ndarray) -> Optional[float]:
+    """Median height in pixels of the text lines (runs of rows containing ink), or None"""
+    rows = ink.mean(axis=1) > 0.01
+    if not rows.any():
+        return None
+    edges = np.diff(np.concatenate(([0], rows.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    heights = ends - starts
+    heights = heights[heights >= 3]
+    return float(np.median(heights)) if heights.size else None
+
+
+def preprocess_image(
+    image: Image.Image,
+    target_text_height: int = OCR_TARGET_TEXT_HEIGHT,
+    max_side: int = OCR_MAX_IMAGE_SIDE,
+    crop: bool = True,
+    deskew: bool = True
+) -> Image.Image:
+    """Grayscale, deskew, crop to the receipt and downsize so text lines are ~``target_text_height`` px.
+
+    Images are only ever scaled down. Crop, rotation and scale are worked
+    out on a small thumbnail; the full image is then downsized first, so
+    the rotation and crop run on the (much smaller) output-sized image.
+    """
+    gray = image if image.mode == "L" else image.convert("L")
+    scale = min(1.0, ANALYSIS_SIDE / max(gray.size))
+    thumb = gray if scale == 1.0 else gray.resize(
+        (max(1, round(gray.width * scale)), max(1, round(gray.height * scale))), Image.Resampling.BOX
+    )
+    pixels = np.asarray(thumb)
+    threshold = otsu_threshold(pixels)
+
+    angle = skew_angle(ink_mask(pixels, threshold)) if deskew else 0.0
+    if abs(angle) < SKEW_STEP_DEGREES:
+        angle = 0.0
+    else:
+        # Fill the thumbnail's new corners as background so they are cropped away below.
+        pixels = np.asarray(Image.fromarray(pixels).rotate(
+            angle, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=0
+        ))
+
+    box = receipt_bbox(pixels, threshold) if crop else None
+    if box is not None:
+        pixels = pixels[box[1]:box[3], box[0]:box[2]]
+
+    # Output size relative to the original image.
+    factor = 1.0
+    line_height = text_height(ink_mask(pixels, threshold))
+    if line_height and target_text_height:
+        factor = min(factor, target_text_height / (line_height / scale))
+    if max_side:
+        factor = min(factor, max_side * scale / max(pixels.shape))
+    if factor >= 0.95:
+        factor = 1.0
+    else:
+        reduce_by = int(1 / factor)
+        if reduce_by >= 2:
+            gray = gray.reduce(reduce_by)
+        size = (max(1, round(image.width * factor)), max(1, round(image.height * factor)))
+        gray = gray.resize(size, Image.Resampling.LANCZOS)
+
+    if angle:
+        gray = gray.rotate(angle, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=255)
+    if box is not None:
+        ratio = factor / scale
+        width, height = gray.size
+        left, top, right, bottom = (round(v * ratio) for v in box)
+        gray = gray.crop((max(0, left), max(0, top), min(width, right), min(height, bottom)))
+    return gray
@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+# How often idle workers look for jobs enqueued by other processes.
+JOB_POLL_SECONDS = 1.0
+
+JOB_STATUSES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+# Handler signature: (payload bytes or None, params) -> JSON-serializable result.
+JobHandler = Callable[[Optional[bytes], Dict], Any]
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class JobQueue:
+    """Persistent background job queue on a local SQLite file.
+
+    Jobs (a kind, optional binary payload and JSON params) are written to
+    the ``jobs`` table and picked up by worker threads running the handler
+    registered for their kind, so callers get a job id back immediately and
+    poll ``get`` for the result. Job state outlives the process: jobs left
+    ``running`` by a process that no longer exists are queued again when
+    workers start.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, workers: int = JOB_WORKERS):
+        self.path = path
+        self.workers = workers
+        self._handlers: Dict[str, JobHandler] = {}
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    owner TEXT,
+                    label TEXT,
+                    payload BLOB,
+                    params TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    worker_pid INTEGER,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_owner_created ON jobs (owner, created_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def submit(
+        self,
+        kind: str,
+        payload: Optional[bytes] = None,
+        params: Optional[Dict] = None,
+        owner: Optional[str] = None,
+        label: Optional[str] = None
+    ) -> str:
+        """Queue a job and return its id; workers are started on first submit"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, owner, label, payload, params, created_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, kind, owner, label, payload, json.dumps(params or {}, default=str), time.time())
+            )
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        logger.info(f"Queued {kind} job {job_id[:8]}")
+        return job_id
+
+    @staticmethod
+    def _job_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    _COLUMNS = (
+        "id, kind, status, owner, label, params, result, error, worker_pid, created_at, started_at, finished_at"
+    )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job state and result (payload excluded), or None for an unknown id"""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job_dict(row) if row else None
+
+    def list_jobs(
+        self,
+        owner: Optional[str] = None,
+        statuses: Optional[Sequence[str]] = None,
+        limit: int = 20
+    ) -> List[Dict]:
+        """Most recent jobs first, optionally for one owner and/or in the given statuses"""
+        clauses, args = [], []
+        if owner is not None:
+            clauses.append("owner = ?")
+            args.append(owner)
+        if statuses:
+            clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            args.extend(statuses)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f"SELECT {self._COLUMNS} FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*args, limit)
+            ).fetchall()
+        return [self._job_dict(row) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', payload = NULL, finished_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+        return cursor.rowcount == 1
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, interval: float = 0.2) -> Optional[Dict]:
+        """Block until the job finishes (or ``timeout`` passes) and return its state"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
+
+    def start(self) -> None:
+        """Recover orphaned jobs, prune old ones and start the worker threads (idempotent)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._stopping.clear()
+            self._recover()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self.workers:
+                logger.info(f"Started {self.workers} job workers on {self.path}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers once their current job finishes"""
+        with self._lock:
+            self._stopping.set()
+            with self._wakeup:
+                self._wakeup.notify_all()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+            self._started = False
+
+    def run_forever(self) -> None:
+        """Run the workers in the foreground (e.g. a dedicated worker process) until interrupted"""
+        self.start()
+        try:
+            while any(thread.is_alive() for thread in self._threads):
+                time.sleep(JOB_POLL_SECONDS)
+        except KeyboardInterrupt:
+            logger.info("Stopping job workers")
+        finally:
+            self.stop()
+
+    def _recover(self) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            running = conn.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+            orphaned = [job_id for job_id, pid in running if not _pid_alive(pid)]
+            conn.executemany(
+                "UPDATE jobs SET status = 'queued', worker_pid = NULL, started_at = NULL WHERE id = ?",
+                [(job_id,) for job_id in orphaned]
+            )
+            conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' for _ in FINISHED_STATUSES)}) "
+                "AND finished_at < ?",
+                (*FINISHED_STATUSES, now - JOB_RETENTION_SECONDS)
+            )
+        if orphaned:
+            logger.info(f"Re-queued {len(orphaned)} jobs interrupted by a previous run")
+
+    def _claim(self) -> Optional[tuple]:
+        """Atomically mark the oldest queued job this process can run as running"""
+        kinds = list(self._handlers)
+        if not kinds:
+            return None
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"SELECT id, kind, payload, params FROM jobs WHERE status = 'queued' "
+                f"AND kind IN ({', '.join('?' for _ in kinds)}) ORDER BY created_at LIMIT 1",
+                kinds
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ? WHERE id = ?",
+                    (os.getpid(), time.time(), row[0])
+                )
+            conn.execute("COMMIT")
+            return row
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, payload = NULL, finished_at = ? WHERE id = ?",
+                (
+                    status,
+                    json.dumps(result, default=str) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id
+                )
+            )
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                logger.warning(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(JOB_POLL_SECONDS)
+                continue
+            job_id, kind, payload, params = job
+            started = time.perf_counter()
+            try:
+                result = self._handlers[kind](payload, json.loads(params))
+                self._finish(job_id, "done", result=result)
+                logger.info(f"Finished {kind} job {job_id[:8]} in {time.perf_counter() - started:.1f}s")
+            except Exception as e:
+                logger.error(f"{kind} job {job_id[:8]} failed: {e}")
+                try:
+                    self._finish(job_id, "failed", error=str(e))
+                except sqlite3.Error as db_error:
+                    logger.error(f"Could not record failure of job {job_id[:8]}: {db_error}")
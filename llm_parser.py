@@ -0,0 +1,196 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Union
+
+from dotenv import load_dotenv
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable, RunnableSequence
+from langchain_groq import ChatGroq
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LLM_MODEL = os.getenv("GROQ_MODEL", "llama3-70b-8192")
+LLM_BASE_URL = os.getenv("GROQ_BASE_URL")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "6000"))
+LLM_MAX_OUTPUT_TOKENS = 256
+
+RECEIPT_PROMPT = """
+                        You will be given OCR text from a receipt or invoice.
+                        Extract the following fields from the text:
+                        - Vendor Name
+                        - Date
+                        - Total Amount
+                        - Category (food, transport, utilities, shopping, entertainment, health, others)
+                        - Description (a short summary including important details)
+
+                        Return the output strictly in this format:
+                        <vendor>...</vendor>
+                        <date>...</date>
+                        <amount>...</amount>
+                        <category>...</category>
+                        <description>...</description>
+
+                        Text:
+                        {text}
+                        """
+
+RESPONSE_FIELDS = {
+    "vendor_name": re.compile(r"<vendor>(.*?)</vendor>", re.DOTALL),
+    "date": re.compile(r"<date>(.*?)</date>", re.DOTALL),
+    "amount": re.compile(r"<amount>(.*?)</amount>", re.DOTALL),
+    "category": re.compile(r"<category>(.*?)</category>", re.DOTALL),
+    "description": re.compile(r"<description>(.*?)</description>", re.DOTALL),
+}
+
+
+def parse_llm_response(response) -> Dict:
+    """Pull the tagged receipt fields out of a model response."""
+    response_text = response.content if hasattr(response, "content") else str(response)
+    result = {}
+    for field, pattern in RESPONSE_FIELDS.items():
+        match = pattern.search(response_text)
+        if match is None:
+            raise ValueError(f"LLM response is missing the {field} field")
+        result[field] = match.group(1).strip()
+    return result
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt + completion token count used for budgeting (~4 characters per token)."""
+    return (len(RECEIPT_PROMPT) + len(text)) // 4 + LLM_MAX_OUTPUT_TOKENS
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate_per_minute``.
+
+    Usable from both threads (``acquire``) and coroutines (``aacquire``), so
+    the synchronous and async parsing paths share one budget.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """Take ``amount`` tokens if available; otherwise return seconds to wait."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1) -> None:
+        while True:
+            wait = self._reserve(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, amount: float = 1) -> None:
+        while True:
+            wait = self._reserve(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+class ReceiptLLMParser:
+    """Receipt field extraction through one reusable prompt | LLM chain.
+
+    ``llm`` may be any LangChain runnable (a fake chat model in tests, or a
+    client pointed at a local stub server through ``GROQ_BASE_URL``); when it
+    is omitted a ChatGroq client is created on first use.
+    """
+
+    def __init__(
+        self,
+        llm: Optional[Runnable] = None,
+        api_key: Optional[str] = None,
+        model: str = LLM_MODEL,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE
+    ):
+        self.prompt = PromptTemplate.from_template(RECEIPT_PROMPT)
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.request_budget = TokenBucket(requests_per_minute)
+        self.token_budget = TokenBucket(tokens_per_minute)
+        self._llm = llm
+        self._chain: Optional[RunnableSequence] = None
+        self._chain_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    @property
+    def chain(self) -> RunnableSequence:
+        if self._chain is None:
+            with self._chain_lock:
+                if self._chain is None:
+                    if self._llm is None:
+                        self._llm = ChatGroq(model=self.model, api_key=self.api_key, base_url=LLM_BASE_URL)
+                    self._chain = self.prompt | self._llm
+        return self._chain
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The parser's own event loop, running on a daemon thread from first use.
+
+        ``parse_many`` always runs on this loop, so the chain's async HTTP
+        client stays bound to one live loop across batches.
+        """
+        if self._loop is None:
+            with self._loop_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="llm-parser-loop", daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    def parse(self, text: str) -> Dict:
+        self.request_budget.acquire()
+        self.token_budget.acquire(estimate_tokens(text))
+        return parse_llm_response(self.chain.invoke({"text": text}))
+
+    async def aparse(self, text: str) -> Dict:
+        await self.request_budget.aacquire()
+        await self.token_budget.aacquire(estimate_tokens(text))
+        return parse_llm_response(await self.chain.ainvoke({"text": text}))
+
+    async def aparse_many(
+        self,
+        texts: Sequence[str],
+        max_concurrency: Optional[int] = None
+    ) -> List[Union[Dict, Exception]]:
+        """Parse ``texts`` concurrently; failures are returned in place as exceptions."""
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def _bounded(text: str) -> Dict:
+            async with semaphore:
+                return await self.aparse(text)
+
+        return await asyncio.gather(*(_bounded(text) for text in texts), return_exceptions=True)
+
+    def parse_many(self, texts: Sequence[str], max_concurrency: Optional[int] = None) -> List[Union[Dict, Exception]]:
+        """Blocking wrapper around ``aparse_many`` for callers outside an event loop."""
+        future = asyncio.run_coroutine_threadsafe(
+            self.aparse_many(texts, max_concurrency=max_concurrency), self.loop
+        )
+        return future.result()
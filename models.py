@@ -1,14 +1,69 @@
+import os
 from datetime import date
-from typing import Optional, List
+from typing import Optional
+from dotenv import load_dotenv
 from pydantic import BaseModel, Field, validator
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, create_engine
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, LargeBinary, create_engine, event, func, select
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import declarative_base, relationship, sessionmaker, validates, object_session
 from sqlalchemy.ext.hybrid import hybrid_property
 
 
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///receipts.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def _configure_sqlite_connection(dbapi_connection, connection_record) -> None:
+    """Per-connection SQLite tuning: WAL lets dashboard readers run alongside an upload's writer."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    """Engine for ``url`` with pool settings from the environment.
+
+    SQLite file databases get WAL mode and the pragmas above on every new
+    connection; PostgreSQL (``postgresql+psycopg2://...``) gets a pre-pinged,
+    recycled connection pool so several app replicas can share one database.
+    """
+    backend = make_url(url).get_backend_name()
+    options = {"echo": False}
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+        if make_url(url).database not in (None, "", ":memory:"):
+            options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    else:
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True
+        )
+    db_engine = create_engine(url, **options)
+    if backend == "sqlite":
+        event.listen(db_engine, "connect", _configure_sqlite_connection)
+    return db_engine
+
+
 Base = declarative_base()
-engine = create_engine('sqlite:///receipts.db', echo=False)
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class CategoryEnum(str, Enum):
@@ -64,31 +119,92 @@ class DBCategory(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), unique=True, nullable=False)
 
+def vendor_name_key(name: str) -> str:
+    """Normalized vendor name used for case- and whitespace-insensitive lookups"""
+    return " ".join(name.split()).lower()
+
 class DBVendor(Base):
     __tablename__ = 'vendors'
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, nullable=False, index=True)
-    category = Column(String(50), nullable=True)
+    name_key = Column(String(100), unique=True, nullable=False, index=True)
+    category = Column(String(50), nullable=True, index=True)
     
     bills = relationship("DBBillEntry", back_populates="vendor")
+
+    @validates("name")
+    def _set_name_key(self, key, name):
+        self.name_key = vendor_name_key(name)
+        return name
     
+    # Denormalized totals kept current by DatabaseHandler writes (see _apply_spending_deltas)
+    cached_total_spent = Column(Float, nullable=False, default=0.0, server_default="0", index=True)
+    bill_count = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+
     @hybrid_property
     def total_spent(self):
-        return sum(bill.amount for bill in self.bills)
+        """Sum of this vendor's bill amounts, computed by the database"""
+        if "bills" in self.__dict__:
+            return sum(bill.amount for bill in self.bills)
+        session = object_session(self)
+        if session is None:
+            return self.cached_total_spent
+        return session.scalar(
+            select(func.coalesce(func.sum(DBBillEntry.amount), 0.0)).where(DBBillEntry.vendor_id == self.id)
+        )
+
+    @total_spent.expression
+    def total_spent(cls):
+        return (
+            select(func.coalesce(func.sum(DBBillEntry.amount), 0.0))
+            .where(DBBillEntry.vendor_id == cls.id)
+            .correlate_except(DBBillEntry)
+            .scalar_subquery()
+        )
 
 class DBBillEntry(Base):
     __tablename__ = 'bill_entries'
     
     id = Column(Integer, primary_key=True, index=True)
     vendor_id = Column(Integer, ForeignKey('vendors.id'), index=True)
-    amount = Column(Float, nullable=False)
+    amount = Column(Float, nullable=False, index=True)
     transaction_date = Column(Date, nullable=False, index=True)
     description = Column(String(1000000))
     file_reference = Column(String(500)) 
     
     vendor = relationship("DBVendor", back_populates="bills")
 
+class DBReceiptText(Base):
+    """Compressed per-page OCR/PDF text of a bill's source file (see receipt_texts.py)"""
+    __tablename__ = 'receipt_texts'
+
+    bill_id = Column(Integer, ForeignKey('bill_entries.id'), primary_key=True)
+    content_hash = Column(String(64), nullable=False, index=True)
+    engine_version = Column(String(100), nullable=False)
+    codec = Column(String(8), nullable=False)
+    pages = Column(LargeBinary, nullable=False)
+    page_count = Column(Integer, nullable=False)
+    char_count = Column(Integer, nullable=False)
+
+class DBDailySpending(Base):
+    """Per-day, per-vendor spending rollup kept current by DatabaseHandler writes"""
+    __tablename__ = 'daily_spending'
+
+    day = Column(Date, primary_key=True)
+    vendor_id = Column(Integer, ForeignKey('vendors.id'), primary_key=True, index=True)
+    total = Column(Float, nullable=False, default=0.0)
+    bill_count = Column(Integer, nullable=False, default=0)
+
+class DBMonthlySpending(Base):
+    """Per-month (YYYY-MM), per-vendor spending rollup kept current by DatabaseHandler writes"""
+    __tablename__ = 'monthly_spending'
+
+    month = Column(String(7), primary_key=True)
+    vendor_id = Column(Integer, ForeignKey('vendors.id'), primary_key=True, index=True)
+    total = Column(Float, nullable=False, default=0.0)
+    bill_count = Column(Integer, nullable=False, default=0)
+
 def create_tables():
     Base.metadata.create_all(bind=engine)
 
@@ -0,0 +1,90 @@
+import os
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+import easyocr
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OCR_LANGUAGES = ["en"]
+OCR_POOL_SIZE = int(os.getenv("OCR_POOL_SIZE", "1"))
+OCR_USE_GPU = os.getenv("OCR_USE_GPU", "false").lower() in ("1", "true", "yes")
+
+
+class ReaderPool:
+    """Fixed-size pool of warm easyocr.Reader instances.
+
+    Readers are built lazily, on first borrow, up to ``size`` instances.
+    Callers borrow a reader with ``with pool.reader() as reader:`` and it is
+    returned to the pool when the block exits.
+    """
+
+    def __init__(self, size: int = OCR_POOL_SIZE, languages: Optional[List[str]] = None, gpu: bool = OCR_USE_GPU):
+        if size < 1:
+            raise ValueError("Reader pool size must be at least 1")
+        self.size = size
+        self.languages = languages or OCR_LANGUAGES
+        self.gpu = gpu
+        self._idle: "queue.LifoQueue[easyocr.Reader]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _build_reader(self) -> easyocr.Reader:
+        logger.info(f"Loading OCR reader {self._created}/{self.size} (languages={self.languages}, gpu={self.gpu})")
+        return easyocr.Reader(self.languages, gpu=self.gpu)
+
+    def acquire(self, timeout: Optional[float] = None) -> easyocr.Reader:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            build = self._created < self.size
+            if build:
+                self._created += 1
+        if build:
+            try:
+                return self._build_reader()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=timeout)
+
+    def release(self, reader: easyocr.Reader) -> None:
+        self._idle.put(reader)
+
+    @contextmanager
+    def reader(self, timeout: Optional[float] = None) -> Iterator[easyocr.Reader]:
+        reader = self.acquire(timeout=timeout)
+        try:
+            yield reader
+        finally:
+            self.release(reader)
+
+    def warm_up(self) -> None:
+        """Build every reader up front instead of on first use."""
+        readers = [self.acquire() for _ in range(self.size)]
+        for reader in readers:
+            self.release(reader)
+
+
+_pool: Optional[ReaderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_reader_pool() -> ReaderPool:
+    """Return the process-wide reader pool, creating it on first call."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ReaderPool()
+    return _pool
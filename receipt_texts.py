@@ -0,0 +1,40 @@
+import os
+import json
+import zlib
+import logging
+from typing import List, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RECEIPT_TEXT_CODEC = os.getenv("RECEIPT_TEXT_CODEC", "zstd" if zstandard is not None else "zlib")
+RECEIPT_TEXT_LEVEL = int(os.getenv("RECEIPT_TEXT_LEVEL", "9"))
+
+
+def compress_pages(pages: List[str], codec: str = RECEIPT_TEXT_CODEC) -> Tuple[str, bytes]:
+    """Compress per-page text for the receipt_texts table; returns ``(codec, blob)``"""
+    payload = json.dumps(pages, ensure_ascii=False).encode("utf-8")
+    if codec == "zstd" and zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=RECEIPT_TEXT_LEVEL).compress(payload)
+    return "zlib", zlib.compress(payload, RECEIPT_TEXT_LEVEL)
+
+
+def decompress_pages(codec: str, blob: bytes) -> List[str]:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Receipt text is zstd-compressed; install zstandard to read it")
+        payload = zstandard.ZstdDecompressor().decompress(blob)
+    elif codec == "zlib":
+        payload = zlib.decompress(blob)
+    else:
+        raise ValueError(f"Unknown receipt text codec: {codec}")
+    return json.loads(payload.decode("utf-8"))
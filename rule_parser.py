@@ -0,0 +1,139 @@
+import os
+import re
+import logging
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from dateutil import parser as date_parser
+from dotenv import load_dotenv
+
+from models import CategoryEnum
+from category_classifier import CategoryClassifier
+from vendor_resolver import VendorResolver
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RULE_PARSER_MIN_CONFIDENCE = float(os.getenv("RULE_PARSER_MIN_CONFIDENCE", "0.8"))
+
+CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "₹": "INR", "rs": "INR", "inr": "INR",
+                    "usd": "USD", "eur": "EUR", "gbp": "GBP"}
+
+_AMOUNT = r"(?P<amount>\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)"
+_CURRENCY = r"(?P<currency>[$€£₹]|rs\.?|inr|usd|eur|gbp)?"
+
+TOTAL_RE = re.compile(
+    r"(?<!sub)(?<!sub )(?<!sub-)\b(?P<label>grand\s+total|total\s+(?:amount|due|paid)|amount\s+due|total)\b"
+    r"[^\S\n]*[:\-]?[^\S\n]*" + _CURRENCY + r"[^\S\n]*" + _AMOUNT,
+    re.IGNORECASE
+)
+DATE_RES = [
+    re.compile(r"\b\d{4}[-/.]\d{1,2}[-/.]\d{1,2}\b"),
+    re.compile(r"\b\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}\b"),
+    re.compile(r"\b\d{1,2}[-\s](?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*[-\s,]+\d{2,4}\b", re.IGNORECASE),
+    re.compile(r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}\b", re.IGNORECASE),
+]
+VENDOR_STOPWORDS_RE = re.compile(
+    r"\b(receipt|invoice|tax|gst|vat|date|time|tel|phone|fax|www|http|order|bill|cashier|table)\b",
+    re.IGNORECASE
+)
+LETTERS_RE = re.compile(r"[A-Za-z]")
+# A price such as 4.50 or 1,299.00 (not part of a dotted date); item lines start at the first one.
+PRICE_RE = re.compile(r"(?<![\d.,/-])\d+[.,]\d{2}(?![\d.,/-])")
+VENDOR_SEARCH_LINES = 5
+
+WEIGHTS = {"amount": 0.45, "date": 0.25, "vendor": 0.2, "category": 0.1}
+# A parse missing any of these scores 0, whatever else it found.
+REQUIRED_FIELDS = ("amount", "vendor")
+
+
+class RuleBasedParser:
+    """Deterministic receipt field extraction for well-formed OCR text.
+
+    ``parse`` returns the same fields as the LLM parser plus a confidence in
+    [0, 1]; callers fall back to the LLM when the confidence is low. A parse
+    without both an amount and a vendor has confidence 0. A vendor is only
+    taken when it is corroborated (see ``_find_vendor``).
+    """
+
+    def __init__(
+        self,
+        classifier: CategoryClassifier,
+        vendor_resolver: Optional[VendorResolver] = None,
+        min_confidence: float = RULE_PARSER_MIN_CONFIDENCE
+    ):
+        self.min_confidence = min_confidence
+        self.classifier = classifier
+        self.vendor_resolver = vendor_resolver
+
+    def parse(self, text: str) -> Tuple[Dict, float]:
+        amount, currency = self._find_total(text)
+        found_date = self._find_date(text)
+        category = self._find_category(text)
+        vendor = self._find_vendor(text, category)
+
+        found = {"amount": amount, "date": found_date, "vendor": vendor, "category": category}
+        confidence = sum(WEIGHTS[field] for field, value in found.items() if value)
+        if not all(found[field] for field in REQUIRED_FIELDS):
+            confidence = 0.0
+        fields = {
+            "vendor_name": vendor or "",
+            "date": found_date.isoformat() if found_date else "",
+            "amount": amount or "",
+            "category": (category or CategoryEnum.OTHER).value,
+            "description": f"Receipt from {vendor}, total {currency or ''}{amount}" if vendor and amount else "",
+            "currency": CURRENCY_SYMBOLS.get((currency or "").lower().rstrip("."), None),
+        }
+        return fields, round(confidence, 2)
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= self.min_confidence
+
+    def _find_total(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        matches = list(TOTAL_RE.finditer(text))
+        if not matches:
+            return None, None
+        grand = [m for m in matches if m.group("label").lower().startswith("grand")]
+        match = (grand or matches)[-1]
+        return match.group("amount").replace(",", ""), match.group("currency")
+
+    def _find_date(self, text: str) -> Optional[date]:
+        for pattern in DATE_RES:
+            for match in pattern.finditer(text):
+                try:
+                    parsed = date_parser.parse(match.group(0), fuzzy=True).date()
+                except (ValueError, OverflowError):
+                    continue
+                if date(2000, 1, 1) <= parsed <= date.today():
+                    return parsed
+        return None
+
+    def _find_vendor(self, text: str, category: Optional[CategoryEnum] = None) -> Optional[str]:
+        """The vendor from the receipt header, or None to leave it to the LLM.
+
+        Only lines before the first price are considered. A line that matches
+        an existing vendor is taken (as that vendor's name); otherwise only the
+        receipt's first line can be the vendor.
+        """
+        lines = [line.strip(" \t*-#:|") for line in text.splitlines() if line.strip()]
+        header = None
+        for index, candidate in enumerate(lines[:VENDOR_SEARCH_LINES]):
+            if PRICE_RE.search(candidate) or TOTAL_RE.search(candidate):
+                break
+            if len(LETTERS_RE.findall(candidate)) < 3 or VENDOR_STOPWORDS_RE.search(candidate):
+                continue
+            if any(p.search(candidate) for p in DATE_RES):
+                continue
+            if self.vendor_resolver is not None:
+                match = self.vendor_resolver.match(candidate[:100], category)
+                if match is not None:
+                    return match[0]
+            if index == 0:
+                header = candidate[:100]
+        return header
+
+    def _find_category(self, text: str) -> Optional[CategoryEnum]:
+        category, score = self.classifier.classify(text)
+        return category if self.classifier.is_confident(score) else None
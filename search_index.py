@@ -0,0 +1,114 @@
+import re
+import logging
+from typing import Optional
+
+from sqlalchemy import Column, Integer, MetaData, Table, literal_column, select, text
+from sqlalchemy.engine import Connection
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "bill_search"
+
+# Lightweight table handle so the FTS5 table can be used in SQLAlchemy selects.
+bill_search = Table(
+    FTS_TABLE, MetaData(),
+    Column("rowid", Integer, key="bill_id"),
+)
+
+_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        vendor, description, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bill_entries_search_insert AFTER INSERT ON bill_entries BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, vendor, description)
+        VALUES (new.id, (SELECT name FROM vendors WHERE id = new.vendor_id), coalesce(new.description, ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bill_entries_search_delete AFTER DELETE ON bill_entries BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bill_entries_search_update AFTER UPDATE OF vendor_id, description ON bill_entries BEGIN
+        UPDATE {FTS_TABLE}
+        SET vendor = (SELECT name FROM vendors WHERE id = new.vendor_id),
+            description = coalesce(new.description, '')
+        WHERE rowid = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS vendors_search_update AFTER UPDATE OF name ON vendors BEGIN
+        UPDATE {FTS_TABLE} SET vendor = new.name
+        WHERE rowid IN (SELECT id FROM bill_entries WHERE vendor_id = new.id);
+    END
+    """,
+]
+
+_TOKEN_RE = re.compile(r'"([^"]+)"|(\S+)')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_search_index(conn: Connection) -> bool:
+    """Create the FTS5 table and sync triggers; backfill when newly created.
+
+    Returns False when the backend is not SQLite or SQLite lacks FTS5.
+    """
+    if conn.dialect.name != "sqlite":
+        return False
+    existed = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first() is not None
+    try:
+        for statement in _FTS_DDL:
+            conn.exec_driver_sql(statement)
+    except Exception as e:
+        logger.warning(f"Full-text search unavailable: {e}")
+        return False
+    if not existed:
+        rebuild_search_index(conn)
+    return True
+
+
+def rebuild_search_index(conn: Connection) -> None:
+    conn.exec_driver_sql(f"DELETE FROM {FTS_TABLE}")
+    conn.exec_driver_sql(
+        f"""
+        INSERT INTO {FTS_TABLE} (rowid, vendor, description)
+        SELECT b.id, v.name, coalesce(b.description, '')
+        FROM bill_entries b LEFT JOIN vendors v ON v.id = b.vendor_id
+        """
+    )
+    logger.info("Full-text search index rebuilt")
+
+
+def build_fts_query(user_query: str) -> Optional[str]:
+    """Turn search box input into an FTS5 MATCH expression.
+
+    Quoted text becomes a phrase query; every other word becomes a prefix
+    query, and all terms must match.
+    """
+    terms = []
+    for phrase, word in _TOKEN_RE.findall(user_query or ""):
+        if phrase:
+            words = _WORD_RE.findall(phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        else:
+            terms.extend(f'"{w}"*' for w in _WORD_RE.findall(word))
+    return " ".join(terms) or None
+
+
+def match_query(fts_query: str):
+    """``SELECT rowid AS bill_id, bm25 AS rank`` for bills matching ``fts_query`` (lower rank is better)."""
+    return (
+        select(
+            bill_search.c.bill_id.label("bill_id"),
+            literal_column(f"bm25({FTS_TABLE}, 2.0, 1.0)").label("rank")
+        )
+        .where(literal_column(FTS_TABLE).op("MATCH")(fts_query))
+    )
@@ -1,24 +1,26 @@
 import re
-from datetime import date, datetime
-from typing import List, Dict, Optional, Tuple, Union
+from datetime import date
+from typing import List, Dict, Optional, Sequence, Tuple, Union, Iterator
 import logging
-import statistics
+import time
+import zipfile
 from pathlib import Path
-from io import BytesIO
-import numpy as np
-import easyocr
-from pdf2image import convert_from_bytes
-from PIL import Image
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
 import pandas as pd
-import PyPDF2
 from models import VendorBase, BillEntryBase, CategoryEnum
 from db_handler import DatabaseHandler
+from text_extraction import SUPPORTED_EXTENSIONS, EXTRACTION_ENGINE_VERSION, extract_pages, extract_pages_task, join_pages
+from extraction_cache import ExtractionCache, content_hash
+from llm_parser import ReceiptLLMParser
+from rule_parser import RuleBasedParser
+from category_classifier import CategoryClassifier
+from export_engine import ExportEngine
+from vendor_resolver import VendorResolver
+from job_queue import JobQueue
 from pydantic import ValidationError
 import os
 from dotenv import load_dotenv
-from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
-from langchain_core.runnables import RunnableSequence
 from dateutil import parser
 
 load_dotenv()
@@ -26,180 +28,241 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+INGEST_LLM_CONCURRENCY = int(os.getenv("INGEST_LLM_CONCURRENCY", "4"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "50"))
+
+
+VENDOR_KEYWORDS = {
+    CategoryEnum.FOOD: [
+        # Restaurant types
+        "restaurant", "cafe", "diner", "bistro", "eatery", "pizzeria", "steakhouse", 
+        "trattoria", "brasserie", "taverna", "gastropub", "food truck", "food stall",
+        # Food service
+        "bakery", "patisserie", "confectionery", "delicatessen", "chocolatier",
+        # Meal types
+        "breakfast", "brunch", "lunch", "dinner", "supper", "takeaway", "delivery",
+        # Cuisines
+        "italian", "mexican", "chinese", "indian", "thai", "japanese", "mediterranean",
+        "vegetarian", "vegan", "halal", "kosher", "gluten-free",
+        # Food brands
+        "mcdonald", "kfc", "burger king", "subway", "domino", "pizza hut",
+        # Food delivery
+        "zomato", "swiggy", "ubereats", "doordash", "grubhub", "deliveroo",
+        # Misc
+        "coffee", "tea house", "juice bar", "smoothie", "ice cream", "gelato",
+        "donut", "bagel", "sandwich", "burger", "taco", "sushi", "ramen"
+    ],
+    
+    CategoryEnum.TRANSPORT: [
+        # Ride services
+        "taxi", "uber", "lyft", "cab", "ride", "ola", "bolt",
+        # Public transport
+        "bus", "train", "metro", "subway", "tram", "ferry", "shuttle",
+        # Vehicle related
+        "fuel", "petrol", "diesel", "gas station", "charging station", "ev charge",
+        "car wash", "auto repair", "tyre", "tire", "mechanic",
+        # Parking/tolls
+        "parking", "toll", "fastag", "valet",
+        # Travel
+        "airport", "airline", "flight", "railway", "transit", "commute"
+    ],
+    
+    CategoryEnum.UTILITIES: [
+        # Core utilities
+        "electric", "water", "gas", "sewer", "waste", "recycling",
+        # Energy
+        "power", "energy", "solar", "wind", "hydro", "utility",
+        # Home services
+        "internet", "broadband", "isp", "mobile", "phone", "cable",
+        "security", "alarm", "surveillance"
+    ],
+    
+    CategoryEnum.SHOPPING: [
+        # Store types
+        "store", "shop", "mall", "boutique", "outlet", "emporium", "hypermarket",
+        # Product categories
+        "grocery", "electronics", "furniture", "apparel", "footwear", "jewelry",
+        # Retailers
+        "walmart", "target", "amazon", "flipkart", "best buy", "ikea",
+        # Shopping actions
+        "purchase", "order", "checkout", "cart", "retail"
+    ],
+    
+    CategoryEnum.ENTERTAINMENT: [
+        # Venues
+        "cinema", "theater", "stadium", "arena", "club", "casino",
+        # Events
+        "concert", "festival", "exhibition", "fair", "show", "performance",
+        # Activities
+        "gaming", "arcade", "bowling", "pool", "darts", "karting",
+        # Media
+        "netflix", "spotify", "youtube", "prime video", "disney+"
+    ],
+    
+    CategoryEnum.HEALTH: [
+        # Facilities
+        "hospital", "clinic", "pharmacy", "lab", "diagnostic",
+        # Professionals
+        "doctor", "dentist", "physician", "therapist", "psychologist",
+        # Services
+        "checkup", "vaccine", "scan", "x-ray", "surgery", "treatment",
+        # Products
+        "medicine", "drug", "vitamin", "supplement", "first aid"
+    ]
+}
+
+
+def iter_receipt_files(source: Union[str, Path]) -> Iterator[Tuple[str, bytes]]:
+    """Yield ``(name, file_bytes)`` for every supported receipt in a directory or zip archive."""
+    path = Path(source)
+    if path.is_dir():
+        for file_path in sorted(path.rglob("*")):
+            if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                yield str(file_path.relative_to(path)), file_path.read_bytes()
+    elif path.is_file() and zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and Path(info.filename).suffix.lower() in SUPPORTED_EXTENSIONS:
+                    yield info.filename, archive.read(info)
+    else:
+        raise ValueError(f"Expected a directory or zip archive: {source}")
+
+
+def _chunked(iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class ReceiptProcessor:
-    def __init__(self):
-        self.db_handler = DatabaseHandler()
+    def __init__(
+        self,
+        db_handler: Optional[DatabaseHandler] = None,
+        extraction_cache: Optional[ExtractionCache] = None,
+        llm_parser: Optional[ReceiptLLMParser] = None,
+        job_queue: Optional[JobQueue] = None
+    ):
+        self.db_handler = db_handler or DatabaseHandler()
+        self.extraction_cache = extraction_cache or ExtractionCache()
         self.groq_api_key = os.getenv("GROQ_API_KEY")
-        self.vendor_keywords = {
-            CategoryEnum.FOOD: [
-                # Restaurant types
-                "restaurant", "cafe", "diner", "bistro", "eatery", "pizzeria", "steakhouse", 
-                "trattoria", "brasserie", "taverna", "gastropub", "food truck", "food stall",
-                # Food service
-                "bakery", "patisserie", "confectionery", "delicatessen", "chocolatier",
-                # Meal types
-                "breakfast", "brunch", "lunch", "dinner", "supper", "takeaway", "delivery",
-                # Cuisines
-                "italian", "mexican", "chinese", "indian", "thai", "japanese", "mediterranean",
-                "vegetarian", "vegan", "halal", "kosher", "gluten-free",
-                # Food brands
-                "mcdonald", "kfc", "burger king", "subway", "domino", "pizza hut",
-                # Food delivery
-                "zomato", "swiggy", "ubereats", "doordash", "grubhub", "deliveroo",
-                # Misc
-                "coffee", "tea house", "juice bar", "smoothie", "ice cream", "gelato",
-                "donut", "bagel", "sandwich", "burger", "taco", "sushi", "ramen"
-            ],
-            
-            CategoryEnum.TRANSPORT: [
-                # Ride services
-                "taxi", "uber", "lyft", "cab", "ride", "ola", "bolt",
-                # Public transport
-                "bus", "train", "metro", "subway", "tram", "ferry", "shuttle",
-                # Vehicle related
-                "fuel", "petrol", "diesel", "gas station", "charging station", "ev charge",
-                "car wash", "auto repair", "tyre", "tire", "mechanic",
-                # Parking/tolls
-                "parking", "toll", "fastag", "valet",
-                # Travel
-                "airport", "airline", "flight", "railway", "transit", "commute"
-            ],
-            
-            CategoryEnum.UTILITIES: [
-                # Core utilities
-                "electric", "water", "gas", "sewer", "waste", "recycling",
-                # Energy
-                "power", "energy", "solar", "wind", "hydro", "utility",
-                # Home services
-                "internet", "broadband", "isp", "mobile", "phone", "cable",
-                "security", "alarm", "surveillance"
-            ],
-            
-            CategoryEnum.SHOPPING: [
-                # Store types
-                "store", "shop", "mall", "boutique", "outlet", "emporium", "hypermarket",
-                # Product categories
-                "grocery", "electronics", "furniture", "apparel", "footwear", "jewelry",
-                # Retailers
-                "walmart", "target", "amazon", "flipkart", "best buy", "ikea",
-                # Shopping actions
-                "purchase", "order", "checkout", "cart", "retail"
-            ],
-            
-            CategoryEnum.ENTERTAINMENT: [
-                # Venues
-                "cinema", "theater", "stadium", "arena", "club", "casino",
-                # Events
-                "concert", "festival", "exhibition", "fair", "show", "performance",
-                # Activities
-                "gaming", "arcade", "bowling", "pool", "darts", "karting",
-                # Media
-                "netflix", "spotify", "youtube", "prime video", "disney+"
-            ],
-            
-            CategoryEnum.HEALTH: [
-                # Facilities
-                "hospital", "clinic", "pharmacy", "lab", "diagnostic",
-                # Professionals
-                "doctor", "dentist", "physician", "therapist", "psychologist",
-                # Services
-                "checkup", "vaccine", "scan", "x-ray", "surgery", "treatment",
-                # Products
-                "medicine", "drug", "vitamin", "supplement", "first aid"
-            ]
-        }
-        self.template ="""
-                        You will be given OCR text from a receipt or invoice.
-                        Extract the following fields from the text:
-                        - Vendor Name
-                        - Date
-                        - Total Amount
-                        - Category (food, transport, utilities, shopping, entertainment, health, others)
-                        - Description (a short summary including important details)
-
-                        Return the output strictly in this format:
-                        <vendor>...</vendor>
-                        <date>...</date>
-                        <amount>...</amount>
-                        <category>...</category>
-                        <description>...</description>
-
-                        Text:
-                        {text}
-                        """
+        self.llm_parser = llm_parser or ReceiptLLMParser(api_key=self.groq_api_key)
+        self.exporter = ExportEngine(self.db_handler)
+        self.vendor_resolver = VendorResolver(self.db_handler)
+        self.vendor_keywords = VENDOR_KEYWORDS
+        self.classifier = CategoryClassifier(self.vendor_keywords)
+        self.rule_parser = RuleBasedParser(self.classifier, self.vendor_resolver)
+        self.jobs = job_queue or JobQueue()
+        self.jobs.register("process_upload", lambda payload, params: self.process_uploaded_file(payload, params["extension"]))
+        self.jobs.register("import_upload", lambda payload, params: self.import_uploaded_file(payload, **params))
+        self.jobs.register("ingest", lambda _, params: self.ingest_batch(**params))
+        self.jobs.register("reprocess", lambda _, params: self.reprocess_bills(**params))
+        self.jobs.register("dedupe_vendors", lambda _, params: self.dedupe_vendors(**params))
+        self.jobs.register("rebuild_rollups", lambda _, params: self.db_handler.rebuild_rollups())
 
     def process_uploaded_file(self, file_bytes: bytes, file_extension: str) -> Dict:
         try:
-            text = self._extract_text(file_bytes, file_extension)
-            extracted_data = self._parse_receipt_text(text)
-            extracted_data["raw_text"] = extracted_data.get("description")
+            key = content_hash(file_bytes)
+            cached = self.extraction_cache.get(key)
+            if cached:
+                logger.info(f"Extraction cache hit for {key[:12]}")
+                pages = cached["pages"]
+                text = cached["text"]
+                extracted_data = dict(cached["parsed"])
+            else:
+                pages = self._extract_pages(file_bytes, file_extension)
+                text = join_pages(pages)
+                extracted_data = self._parse_text(text)
+                self.extraction_cache.put(key, text, extracted_data, pages=pages)
+            self._apply_category_classifier(extracted_data, text)
             validated_data = self._validate_extracted_data(extracted_data)
+            validated_data["text"] = {"content_hash": key, "pages": pages, "engine_version": EXTRACTION_ENGINE_VERSION}
+            match = self.vendor_resolver.match(validated_data["vendor"]["name"], validated_data["vendor"]["category"])
+            if match is not None:
+                validated_data["vendor"]["name"] = match[0]
             return validated_data
         except Exception as e:
             logger.error(f"Error processing file: {e}")
             raise
 
-    def _extract_text(self, file_bytes: bytes, file_extension: str) -> str:
-        try:
-            reader = easyocr.Reader(['en'], gpu=False)
-            if file_extension.lower() in ('.jpg', '.jpeg', '.png'):
-                image = Image.open(BytesIO(file_bytes))
-                result = reader.readtext(np.array(image), detail=0, paragraph=True)
-                return "\n".join(result)
-            elif file_extension.lower() == '.pdf':
-                pdf_reader = PyPDF2.PdfReader(BytesIO(file_bytes))
-                text_blocks = []
-                for page in pdf_reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_blocks.append(page_text)
-                text = "\n".join(text_blocks).strip()
-                if not text or len(text) < 10:
-                    images = convert_from_bytes(file_bytes)
-                    ocr_blocks = []
-                    for img in images:
-                        result = reader.readtext(np.array(img), detail=0, paragraph=True)
-                        ocr_blocks.append("\n".join(result))
-                    text = "\n".join(ocr_blocks)
-                return text
-            elif file_extension.lower() == '.txt':
-                return file_bytes.decode('utf-8')
-            else:
-                raise ValueError(f"Unsupported file type: {file_extension}")
-        except Exception as e:
-            logger.error(f"Text extraction failed: {e}")
-            raise
+    def import_uploaded_file(self, file_bytes: bytes, file_extension: str, file_reference: Optional[str] = None) -> Dict:
+        """Process and save a receipt without manual review; returns the new bill id and saved fields"""
+        data = self.process_uploaded_file(file_bytes, file_extension)
+        if isinstance(data["vendor"].get("category"), CategoryEnum):
+            data["vendor"]["category"] = data["vendor"]["category"].value
+        data["vendor"]["name"] = self.vendor_resolver.resolve(data["vendor"]["name"], data["vendor"]["category"])
+        data["bill"]["file_reference"] = file_reference
+        data["bill"].pop("vendor_id", None)
+        (bill_id,) = self.db_handler.add_bills_bulk([data])
+        return {"bill_id": bill_id, "vendor": data["vendor"], "bill": data["bill"]}
 
-    def _parse_receipt_text(self, text: str) -> Dict:
-        prompt = PromptTemplate.from_template(self.template)
-
-        llm = ChatGroq(
-            model="llama3-70b-8192",
-            api_key=self.groq_api_key,
+    def enqueue_upload(
+        self,
+        file_bytes: bytes,
+        file_extension: str,
+        owner: Optional[str] = None,
+        label: Optional[str] = None
+    ) -> str:
+        """Run ``process_uploaded_file`` on a background worker; returns the job id to poll with ``get_job``"""
+        return self.jobs.submit(
+            "process_upload", payload=file_bytes, params={"extension": file_extension}, owner=owner, label=label
         )
-        chain: RunnableSequence = prompt | llm
 
-        response = chain.invoke({"text": text})
-        if hasattr(response, "content"):
-            response_text = response.content
-        else:
-            response_text = str(response)
+    def enqueue_job(
+        self,
+        kind: str,
+        payload: Optional[bytes] = None,
+        owner: Optional[str] = None,
+        label: Optional[str] = None,
+        **params
+    ) -> str:
+        """Queue ``import_upload``, ``ingest``, ``reprocess``, ``dedupe_vendors`` or ``rebuild_rollups`` with keyword ``params``"""
+        return self.jobs.submit(kind, payload=payload, params=params, owner=owner, label=label)
 
-        vendor = re.search(r"<vendor>(.*?)</vendor>", response_text).group(1)
-        date = re.search(r"<date>(.*?)</date>", response_text).group(1)
-        amount = re.search(r"<amount>(.*?)</amount>", response_text).group(1)
-        category = re.search(r"<category>(.*?)</category>", response_text).group(1)
-        description = re.search(r"<description>(.*?)</description>", response_text).group(1)
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Job state; a finished upload's result is the ``process_uploaded_file`` dict, ready for ``save_extracted_data``"""
+        job = self.jobs.get(job_id)
+        if job and job["kind"] == "process_upload" and job["status"] == "done":
+            bill = job["result"]["bill"]
+            if bill.get("transaction_date"):
+                bill["transaction_date"] = date.fromisoformat(bill["transaction_date"])
+        return job
+
+    def list_jobs(self, owner: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        return self.jobs.list_jobs(owner=owner, limit=limit)
+
+    def _extract_pages(self, file_bytes: bytes, file_extension: str) -> List[str]:
+        return extract_pages(file_bytes, file_extension)
+
+    def _rule_parse(self, text: str) -> Optional[Dict]:
+        """Rule-based fields when the parse is confident and passes validation, otherwise None."""
+        fields, confidence = self.rule_parser.parse(text)
+        if not self.rule_parser.is_confident(confidence):
+            return None
+        try:
+            self._validate_extracted_data(dict(fields))
+        except ValueError as e:
+            logger.info(f"Rule-based parse failed validation, falling back to the LLM: {e}")
+            return None
+        logger.info(f"Rule-based parse accepted (confidence {confidence})")
+        return fields
+
+    def _parse_text(self, text: str) -> Dict:
+        """Use the rule-based parser when it is confident, otherwise the LLM."""
+        return self._rule_parse(text) or self._parse_receipt_text(text)
+
+    def _apply_category_classifier(self, extracted_data: Dict, text: str) -> None:
+        """Replace the parsed category when the keyword classifier is confident."""
+        category, confidence = self.classifier.classify(f"{extracted_data.get('vendor_name', '')}\n{text}")
+        if category is not None and self.classifier.is_confident(confidence):
+            extracted_data["category"] = category.value
+
+    def _parse_receipt_text(self, text: str) -> Dict:
+        return self.llm_parser.parse(text)
 
-        return {
-            "vendor_name": vendor,
-            "date": date,
-            "amount": amount,
-            "category": category,
-            "description": description
-        }
-    
     def _parse_date_string(self, date_str: str) -> date:
         """Parse various date string formats to a Python date object."""
         try:
@@ -238,7 +301,7 @@ class ReceiptProcessor:
                 vendor_id=0,
                 amount=amount_value,
                 transaction_date=parsed_date,
-                description=data.get("raw_text", "")
+                description=data.get("description", "")
             )
             return {
                 "vendor": vendor_data.dict(),
@@ -255,17 +318,185 @@ class ReceiptProcessor:
             if vendor_data.get("category") and isinstance(vendor_data["category"], CategoryEnum):
                 vendor_data["category"] = vendor_data["category"].value
             created, vendor = self.db_handler.add_vendor(vendor_data)
+            if created:
+                self.vendor_resolver.remember(vendor.name, vendor.category)
             bill_data = extracted_data["bill"]
             bill_data["vendor_id"] = vendor.id
             bill_data["file_reference"] = file_reference
-            self.db_handler.add_bill(bill_data)
+            self.db_handler.add_bill(bill_data, text=extracted_data.get("text"))
             return True, "Data saved successfully"
         except Exception as e:
             logger.error(f"Error saving data: {e}")
             return False, str(e)
 
 
-    def search_bills(
+    def ingest_batch(
+        self,
+        source: Union[str, Path],
+        workers: int = INGEST_WORKERS,
+        llm_concurrency: int = INGEST_LLM_CONCURRENCY,
+        batch_size: int = INGEST_BATCH_SIZE
+    ) -> Dict:
+        """Ingest every receipt in a directory or zip archive.
+
+        Text extraction runs across a process pool, LLM parsing runs with at
+        most ``llm_concurrency`` requests in flight, and each batch of ``batch_size`` files is
+        saved in a single transaction. Returns per-file statuses plus timings.
+        """
+        started = time.perf_counter()
+        report = {"files": [], "timings": {"extract": 0.0, "parse": 0.0, "save": 0.0}}
+        with ProcessPoolExecutor(max_workers=workers) as extract_pool:
+            for batch in _chunked(iter_receipt_files(source), batch_size):
+                report["files"].extend(self._ingest_chunk(batch, extract_pool, llm_concurrency, report["timings"]))
+                logger.info(f"Ingested {len(report['files'])} files from {source}")
+
+        elapsed = time.perf_counter() - started
+        report["total"] = len(report["files"])
+        report["saved"] = sum(1 for f in report["files"] if f["status"] == "saved")
+        report["failed"] = report["total"] - report["saved"]
+        report["elapsed_seconds"] = elapsed
+        report["files_per_second"] = report["total"] / elapsed if elapsed > 0 else 0.0
+        return report
+
+    def _ingest_chunk(
+        self,
+        batch: List[Tuple[str, bytes]],
+        extract_pool: ProcessPoolExecutor,
+        llm_concurrency: int,
+        timings: Dict[str, float]
+    ) -> List[Dict]:
+        statuses = {name: {"file": name, "status": "pending"} for name, _ in batch}
+        hashes, pages, texts, parsed = {}, {}, {}, {}
+
+        stage_start = time.perf_counter()
+        futures = {}
+        for name, file_bytes in batch:
+            hashes[name] = content_hash(file_bytes)
+            cached = self.extraction_cache.get(hashes[name])
+            if cached:
+                pages[name] = cached["pages"]
+                texts[name] = cached["text"]
+                parsed[name] = dict(cached["parsed"])
+                statuses[name]["cached"] = True
+            else:
+                futures[extract_pool.submit(extract_pages_task, (name, file_bytes, Path(name).suffix))] = name
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                pages[name] = future.result()[1]
+                texts[name] = join_pages(pages[name])
+            except Exception as e:
+                statuses[name].update(status="failed", stage="extract", error=str(e))
+        timings["extract"] += time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        for name, text in texts.items():
+            if name in parsed:
+                continue
+            fields = self._rule_parse(text)
+            if fields is not None:
+                parsed[name] = fields
+                statuses[name]["parser"] = "rules"
+                self.extraction_cache.put(hashes[name], text, fields, pages=pages[name])
+        pending = [name for name in texts if name not in parsed]
+        results = self.llm_parser.parse_many([texts[name] for name in pending], max_concurrency=llm_concurrency)
+        for name, result in zip(pending, results):
+            if isinstance(result, Exception):
+                statuses[name].update(status="failed", stage="parse", error=str(result))
+                continue
+            parsed[name] = result
+            self.extraction_cache.put(hashes[name], texts[name], result, pages=pages[name])
+        timings["parse"] += time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        records, record_names = [], []
+        for name, _ in batch:
+            if name not in parsed:
+                continue
+            try:
+                data = dict(parsed[name])
+                self._apply_category_classifier(data, texts[name])
+                validated = self._validate_extracted_data(data)
+            except Exception as e:
+                statuses[name].update(status="failed", stage="validate", error=str(e))
+                continue
+            if isinstance(validated["vendor"].get("category"), CategoryEnum):
+                validated["vendor"]["category"] = validated["vendor"]["category"].value
+            validated["bill"]["file_reference"] = name
+            validated["text"] = {
+                "content_hash": hashes[name], "pages": pages[name], "engine_version": EXTRACTION_ENGINE_VERSION
+            }
+            validated["vendor"]["name"] = self.vendor_resolver.resolve(
+                validated["vendor"]["name"], validated["vendor"]["category"]
+            )
+            records.append(validated)
+            record_names.append(name)
+        if records:
+            try:
+                bill_ids = self.db_handler.add_bills_bulk(records)
+                for name, bill_id in zip(record_names, bill_ids):
+                    statuses[name].update(status="saved", bill_id=bill_id)
+            except Exception as e:
+                for name in record_names:
+                    statuses[name].update(status="failed", stage="save", error=str(e))
+        timings["save"] += time.perf_counter() - stage_start
+
+        return [statuses[name] for name, _ in batch]
+
+    def reprocess_bills(
+        self,
+        bill_ids: Optional[Sequence[int]] = None,
+        llm_concurrency: int = INGEST_LLM_CONCURRENCY,
+        batch_size: int = INGEST_BATCH_SIZE
+    ) -> Dict:
+        """Re-parse bills from their stored receipt text (no OCR) and update vendor, amount, date and description.
+
+        Bills saved before receipt texts were stored are skipped.
+        """
+        report = {"total": 0, "updated": 0, "failed": 0, "errors": {}}
+        for batch in _chunked(self.db_handler.iter_receipt_texts(bill_ids), batch_size):
+            report["total"] += len(batch)
+            parsed = {}
+            for stored in batch:
+                fields = self._rule_parse(stored["text"])
+                if fields is not None:
+                    parsed[stored["bill_id"]] = fields
+            pending = [stored for stored in batch if stored["bill_id"] not in parsed]
+            results = self.llm_parser.parse_many([stored["text"] for stored in pending], max_concurrency=llm_concurrency)
+            for stored, result in zip(pending, results):
+                parsed[stored["bill_id"]] = result
+            for stored in batch:
+                bill_id, result = stored["bill_id"], parsed[stored["bill_id"]]
+                try:
+                    if isinstance(result, Exception):
+                        raise result
+                    self.extraction_cache.put(stored["content_hash"], stored["text"], result, pages=stored["pages"])
+                    data = dict(result)
+                    self._apply_category_classifier(data, stored["text"])
+                    validated = self._validate_extracted_data(data)
+                    vendor_data = validated["vendor"]
+                    vendor_data["name"] = self.vendor_resolver.resolve(vendor_data["name"], vendor_data["category"])
+                    if isinstance(vendor_data.get("category"), CategoryEnum):
+                        vendor_data["category"] = vendor_data["category"].value
+                    _, vendor = self.db_handler.add_vendor(vendor_data)
+                    self.db_handler.update_bill(bill_id, {
+                        "vendor_id": vendor.id,
+                        "amount": validated["bill"]["amount"],
+                        "transaction_date": validated["bill"]["transaction_date"],
+                        "description": validated["bill"]["description"],
+                    })
+                    report["updated"] += 1
+                except Exception as e:
+                    report["failed"] += 1
+                    report["errors"][bill_id] = str(e)
+        logger.info(f"Reprocessed {report['updated']}/{report['total']} bills from stored text")
+        return report
+
+    def dedupe_vendors(self, dry_run: bool = False) -> List[Dict]:
+        """Merge vendors whose names are OCR/LLM variants of each other (see ``VendorResolver``)"""
+        return self.vendor_resolver.dedupe(dry_run=dry_run)
+
+    def search_bills_page(
         self,
         query: Optional[str] = None,
         start_date: Optional[date] = None,
@@ -273,56 +504,41 @@ class ReceiptProcessor:
         category: Optional[CategoryEnum] = None,
         min_amount: Optional[float] = None,
         max_amount: Optional[float] = None,
-        limit: int = 50,
-        sort_by: str = "date",         
-        sort_desc: bool = True         
-    ) -> List[Dict]:
-        """Optimized vendor search with hashed indexing and efficient sorting"""
-        bills = self.db_handler.get_bills(
+        cursor: Optional[str] = None,
+        page_size: int = 25,
+        sort_by: str = "date",
+        sort_desc: bool = True
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """One keyset page of bills plus the cursor for the next page.
+
+        ``query`` is a full-text search over vendor names and descriptions;
+        ``sort_by="relevance"`` ranks its matches best first.
+        """
+        bills, next_cursor = self.db_handler.get_bills_page(
+            cursor=cursor,
+            page_size=page_size,
+            sort=sort_by,
+            sort_desc=sort_desc,
             start_date=start_date,
             end_date=end_date,
             category=category.value if isinstance(category, CategoryEnum) else category,
             min_amount=min_amount,
             max_amount=max_amount,
-            limit=limit
+            text_query=query.strip() if query else None
         )
-        vendor_map = {}
-        results = []
-        for bill in bills:
-            vendor_name = (bill.vendor.name or "").lower()
-            bill_dict = {
-                "id": bill.id,
-                "vendor": bill.vendor.name if bill.vendor else "",
-                "amount": bill.amount,
-                "date": bill.transaction_date,
-                "category": bill.vendor.category if bill.vendor else "",
-                "description": bill.description,
-                "file_reference": bill.file_reference
-            }
-            results.append(bill_dict)
-            if vendor_name not in vendor_map:
-                vendor_map[vendor_name] = []
-            vendor_map[vendor_name].append(bill_dict)
-
-        if query:
-            query = query.lower().strip()
-            filtered_results = []
-            for vendor_key in vendor_map:
-                if query in vendor_key:
-                    filtered_results.extend(vendor_map[vendor_key])
-            results = filtered_results
-
-        if sort_by in {"vendor", "amount", "date", "category"}:
-            results = sorted(
-                results,
-                key=lambda x: (
-                    x[sort_by] if x[sort_by] is not None else (date.min if sort_by == "date" else "")
-                ),
-                reverse=sort_desc
-            )
-
-        return results
+        return [self._bill_to_dict(bill) for bill in bills], next_cursor
 
+    @staticmethod
+    def _bill_to_dict(bill) -> Dict:
+        return {
+            "id": bill.id,
+            "vendor": bill.vendor.name if bill.vendor else "",
+            "amount": bill.amount,
+            "date": bill.transaction_date,
+            "category": bill.vendor.category if bill.vendor else "",
+            "description": bill.description,
+            "file_reference": bill.file_reference
+        }
 
     def get_spending_analytics(self, time_period: str = "monthly") -> Dict:
         if time_period == "monthly":
@@ -340,34 +556,67 @@ class ReceiptProcessor:
                 "categories": [item[0] if item[0] else "Other" for item in data],
                 "amounts": [float(item[1]) for item in data]
             }
+        elif time_period == "daily":
+            data = self.db_handler.get_daily_spending()
+            return {
+                "labels": [item[0] for item in data],
+                "amounts": [float(item[1]) for item in data]
+            }
+        elif time_period in ("vendor", "vendor_frequency"):
+            data = self.db_handler.get_vendor_spending(
+                order_by="bill_count" if time_period == "vendor_frequency" else "total"
+            )
+            return {
+                "vendors": [item[0] for item in data],
+                "amounts": [float(item[1]) for item in data],
+                "counts": [int(item[2]) for item in data]
+            }
         else:
             raise ValueError("Invalid time period specified")
 
-    def get_statistics(self) -> Dict:
-        bills = self.db_handler.get_bills(limit=1000)
-        amounts = [bill.amount for bill in bills]
-        
-        if not amounts:
-            return {}
-        
+    def get_statistics(
+        self,
+        query: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category: Optional[CategoryEnum] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None
+    ) -> Dict:
+        """Summary statistics over every bill matching the filters"""
+        return self.db_handler.get_bill_statistics(
+            start_date=start_date,
+            end_date=end_date,
+            category=category.value if isinstance(category, CategoryEnum) else category,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            text_query=query.strip() if query else None
+        )
+
+    @staticmethod
+    def _export_filters(
+        query: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category: Optional[CategoryEnum] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None
+    ) -> Dict:
         return {
-            "total": sum(amounts),
-            "average": statistics.mean(amounts),
-            "median": statistics.median(amounts),
-            "min": min(amounts),
-            "max": max(amounts),
-            "count": len(amounts)
+            "start_date": start_date,
+            "end_date": end_date,
+            "category": category.value if isinstance(category, CategoryEnum) else category,
+            "min_amount": min_amount,
+            "max_amount": max_amount,
+            "text_query": query.strip() if query else None
         }
 
-    def export_to_dataframe(self) -> pd.DataFrame:
-        bills = self.db_handler.get_bills(limit=1000)
-        data = []   
-        for bill in bills:
-            data.append({
-                "Date": bill.transaction_date,
-                "Vendor": bill.vendor.name,
-                "Amount": bill.amount,
-                "Category": bill.vendor.category if bill.vendor.category else None,
-                "Description": bill.description
-            })   
-        return pd.DataFrame(data)
\ No newline at end of file
+    def preview_export(self, limit: int = 20, columns: Optional[List[str]] = None, **filters) -> pd.DataFrame:
+        return self.exporter.preview(limit=limit, columns=columns, **self._export_filters(**filters))
+
+    def write_export(self, fmt: str, fileobj, columns: Optional[List[str]] = None, **filters) -> int:
+        """Write a chunked ``csv``/``ndjson``/``xlsx``/``parquet``/``arrow`` export; filters as in ``get_statistics``"""
+        return self.exporter.write(fmt, fileobj, columns=columns, **self._export_filters(**filters))
+
+    def export_stream(self, fmt: str, columns: Optional[List[str]] = None, **filters) -> Iterator[bytes]:
+        return self.exporter.stream(fmt, columns=columns, **self._export_filters(**filters))
@@ -0,0 +1,163 @@
+import os
+import time
+import difflib
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from io import BytesIO
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import easyocr
+import numpy as np
+import PyPDF2
+from PIL import Image
+from dotenv import load_dotenv
+from pdf2image import convert_from_bytes
+
+from ocr_pool import OCR_POOL_SIZE, get_reader_pool
+from image_preprocessing import OCR_PREPROCESS, PREPROCESS_VERSION, load_image, preprocess_image
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.pdf', '.txt')
+PDF_OCR_DPI = int(os.getenv("PDF_OCR_DPI", "200"))
+PDF_OCR_WORKERS = int(os.getenv("PDF_OCR_WORKERS", str(OCR_POOL_SIZE)))
+PDF_MIN_PAGE_CHARS = 10
+# Stored with each receipt's text so reprocessing can tell which extractor produced it.
+EXTRACTION_ENGINE_VERSION = f"easyocr-{easyocr.__version__}+pypdf2-{PyPDF2.__version__}" + (
+    f"+{PREPROCESS_VERSION}" if OCR_PREPROCESS else ""
+)
+
+
+def extract_pages(file_bytes: bytes, file_extension: str) -> List[str]:
+    """Extracted text per page (one entry for images and text files)."""
+    try:
+        if file_extension.lower() in ('.jpg', '.jpeg', '.png'):
+            image = load_image(file_bytes) if OCR_PREPROCESS else Image.open(BytesIO(file_bytes))
+            return [_ocr_image(image)]
+        elif file_extension.lower() == '.pdf':
+            return extract_pdf_pages(file_bytes)
+        elif file_extension.lower() == '.txt':
+            return [file_bytes.decode('utf-8')]
+        else:
+            raise ValueError(f"Unsupported file type: {file_extension}")
+    except Exception as e:
+        logger.error(f"Text extraction failed: {e}")
+        raise
+
+
+def _ocr_image(image: Image.Image, preprocess: bool = OCR_PREPROCESS, **options) -> str:
+    # Preprocess before borrowing a reader so the pool isn't held during resizing.
+    if preprocess:
+        image = preprocess_image(image, **options)
+    with get_reader_pool().reader() as reader:
+        result = reader.readtext(np.asarray(image), detail=0, paragraph=True)
+    return "\n".join(result)
+
+
+def _rasterize_pages(file_bytes: bytes, page_numbers: List[int], dpi: int) -> Iterator[Tuple[int, Image.Image]]:
+    """Yield ``(index, image)`` for the given 0-based pages, rendering one page per call."""
+    for index in page_numbers:
+        images = convert_from_bytes(file_bytes, dpi=dpi, first_page=index + 1, last_page=index + 1)
+        if images:
+            yield index, images[0]
+
+
+def extract_pdf_pages(file_bytes: bytes, dpi: int = PDF_OCR_DPI, workers: int = PDF_OCR_WORKERS) -> List[str]:
+    """Per-page PDF text, OCR'ing only the pages without a usable text layer.
+
+    Image-only pages are rasterized one at a time and OCR'd on up to
+    ``workers`` threads (each borrowing a reader from the pool), with at
+    most ``workers + 1`` rendered pages held in memory.
+    """
+    pdf_reader = PyPDF2.PdfReader(BytesIO(file_bytes))
+    pages = [page.extract_text() or "" for page in pdf_reader.pages]
+    image_only = [i for i, text in enumerate(pages) if len(text.strip()) < PDF_MIN_PAGE_CHARS]
+    if not image_only:
+        return pages
+    logger.info(f"OCR'ing {len(image_only)} of {len(pages)} PDF pages at {dpi} dpi")
+    workers = max(1, min(workers, len(image_only)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = {}
+        for index, image in _rasterize_pages(file_bytes, image_only, dpi):
+            if len(in_flight) >= workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pages[in_flight.pop(future)] = future.result()
+            in_flight[executor.submit(_ocr_image, image)] = index
+        for future in as_completed(in_flight):
+            pages[in_flight[future]] = future.result()
+    return pages
+
+
+def join_pages(pages: List[str]) -> str:
+    return "\n".join(page for page in pages if page)
+
+
+def extract_text(file_bytes: bytes, file_extension: str) -> str:
+    return join_pages(extract_pages(file_bytes, file_extension))
+
+
+def extract_pages_task(task: Tuple[str, bytes, str]) -> Tuple[str, List[str]]:
+    """Process-pool entry point: ``(name, file_bytes, extension) -> (name, pages)``."""
+    name, file_bytes, file_extension = task
+    return name, extract_pages(file_bytes, file_extension)
+
+
+def _normalized(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def benchmark_preprocessing(directory: str, target_heights: Sequence[Optional[int]]) -> List[Dict]:
+    """OCR latency and accuracy per target text height for the images in ``directory``.
+
+    Accuracy is the ``difflib`` similarity ratio against a same-named ``.txt``
+    ground-truth file; images without one are timed only. ``None`` in
+    ``target_heights`` benchmarks OCR on the unprocessed image.
+    """
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(name)
+        if extension.lower() not in ('.jpg', '.jpeg', '.png'):
+            continue
+        with open(os.path.join(directory, name), "rb") as fh:
+            file_bytes = fh.read()
+        truth_path = os.path.join(directory, stem + ".txt")
+        truth = None
+        if os.path.exists(truth_path):
+            with open(truth_path, encoding="utf-8") as fh:
+                truth = _normalized(fh.read())
+        samples.append((file_bytes, truth))
+    if not samples:
+        raise ValueError(f"No images found in {directory}")
+
+    results = []
+    for height in target_heights:
+        prep_seconds = ocr_seconds = 0.0
+        scores, pixels = [], 0
+        for file_bytes, truth in samples:
+            started = time.perf_counter()
+            if height is None:
+                image = Image.open(BytesIO(file_bytes))
+                image.load()
+            else:
+                image = preprocess_image(load_image(file_bytes), target_text_height=height)
+            prepared = time.perf_counter()
+            text = _ocr_image(image, preprocess=False)
+            prep_seconds += prepared - started
+            ocr_seconds += time.perf_counter() - prepared
+            pixels += image.width * image.height
+            if truth is not None:
+                scores.append(difflib.SequenceMatcher(None, _normalized(text), truth, autojunk=False).ratio())
+        results.append({
+            "target_text_height": height,
+            "images": len(samples),
+            "megapixels": pixels / len(samples) / 1e6,
+            "preprocess_ms": 1000 * prep_seconds / len(samples),
+            "ocr_ms": 1000 * ocr_seconds / len(samples),
+            "accuracy": sum(scores) / len(scores) if scores else None,
+        })
+        logger.info(f"Benchmarked target text height {height}: {results[-1]}")
+    return results
@@ -0,0 +1,229 @@
+import os
+import re
+import logging
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from db_handler import DatabaseHandler
+from models import vendor_name_key
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VENDOR_MATCH_THRESHOLD = float(os.getenv("VENDOR_MATCH_THRESHOLD", "0.8"))
+# Shared words shorter than this don't count towards token containment ("abc" in "abc pharmacy").
+MIN_CONTAINMENT_TOKEN_LENGTH = 4
+# Containment only applies when the shorter name has at least this many such words, so a
+# one-word name ("Uber", "Pharmacy") never absorbs every longer name that contains it.
+MIN_CONTAINMENT_TOKENS = 2
+
+VENDOR_NOISE_TOKENS = {
+    "the", "inc", "llc", "ltd", "pvt", "co", "corp", "company", "limited", "store", "shop", "no",
+}
+
+_APOSTROPHE_RE = re.compile(r"['’`´]")
+_STORE_NUMBER_RE = re.compile(r"(?:#|\bno\.?|\bstore)\s*\d+|\d+", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def vendor_tokens(name: str) -> List[str]:
+    """Normalized name tokens: accents, apostrophes, store numbers and noise words removed.
+
+    "STARBUCKS #1234", "Starbuck's" and "Starbucks" all become ["starbucks"].
+    """
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    text = _STORE_NUMBER_RE.sub(" ", _APOSTROPHE_RE.sub("", text))
+    tokens = [t for t in _NON_WORD_RE.split(text) if t]
+    return [t for t in tokens if t not in VENDOR_NOISE_TOKENS] or tokens
+
+
+def trigrams(tokens: List[str]) -> Set[str]:
+    padded = f" {' '.join(tokens)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def vendor_similarity(a: str, b: str) -> float:
+    """Similarity in [0, 1] between two vendor names (see ``VendorResolver``)"""
+    tokens_a, tokens_b = vendor_tokens(a), vendor_tokens(b)
+    return _similarity(tokens_a, trigrams(tokens_a), tokens_b, trigrams(tokens_b))
+
+
+def _similarity(tokens_a: List[str], grams_a: Set[str], tokens_b: List[str], grams_b: Set[str]) -> float:
+    if not grams_a or not grams_b:
+        return 0.0
+    dice = 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+    set_a, set_b = set(tokens_a), set(tokens_b)
+    shorter = set_a if len(set_a) <= len(set_b) else set_b
+    if sum(1 for t in shorter if len(t) >= MIN_CONTAINMENT_TOKEN_LENGTH) < MIN_CONTAINMENT_TOKENS:
+        return dice
+    shared = [t for t in set_a & set_b if len(t) >= MIN_CONTAINMENT_TOKEN_LENGTH]
+    return max(dice, len(shared) / len(shorter))
+
+
+def _category(category) -> Optional[str]:
+    return getattr(category, "value", category) or None
+
+
+class VendorResolver:
+    """Maps noisy vendor names onto existing vendors.
+
+    Names are normalized to tokens and indexed by character trigram and by
+    token, so candidates for a name are found through a few posting-list
+    lookups instead of comparing against every vendor. A candidate matches
+    when the trigram Dice coefficient, or (for names of two or more words)
+    the share of the shorter name's tokens found in the other name, reaches
+    ``threshold``. Vendors of a different category never match.
+    """
+
+    def __init__(self, db_handler: DatabaseHandler, threshold: float = VENDOR_MATCH_THRESHOLD):
+        self.db_handler = db_handler
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._names: List[str] = []
+        self._keys: Dict[str, int] = {}
+        self._tokens: List[List[str]] = []
+        self._grams: List[Set[str]] = []
+        self._categories: List[Optional[str]] = []
+        self._gram_index: Dict[str, Set[int]] = defaultdict(set)
+        self._token_index: Dict[str, Set[int]] = defaultdict(set)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for _, name, category in self.db_handler.get_vendor_names():
+                self._add(name, category)
+            self._loaded = True
+            logger.info(f"Vendor resolver indexed {len(self._names)} vendors")
+
+    def reset(self) -> None:
+        """Drop the index; it is rebuilt from the database on next use (e.g. after merges)"""
+        with self._lock:
+            self._loaded = False
+            self._names, self._keys, self._tokens, self._grams, self._categories = [], {}, [], [], []
+            self._gram_index.clear()
+            self._token_index.clear()
+
+    def _add(self, name: str, category=None) -> int:
+        key = vendor_name_key(name)
+        if key in self._keys:
+            return self._keys[key]
+        position = self._keys[key] = len(self._names)
+        tokens = vendor_tokens(name)
+        grams = trigrams(tokens)
+        self._names.append(name)
+        self._categories.append(_category(category))
+        self._tokens.append(tokens)
+        self._grams.append(grams)
+        for gram in grams:
+            self._gram_index[gram].add(position)
+        for token in tokens:
+            if len(token) >= MIN_CONTAINMENT_TOKEN_LENGTH:
+                self._token_index[token].add(position)
+        return position
+
+    def remember(self, name: str, category=None) -> None:
+        """Index a vendor created outside the resolver so later names can match it"""
+        self._ensure_loaded()
+        with self._lock:
+            self._add(name, category)
+
+    def _candidates(self, tokens: List[str], grams: Set[str]) -> Set[int]:
+        # Dice >= t needs at least t * |grams| / 2 shared trigrams.
+        hits = Counter()
+        for gram in grams:
+            hits.update(self._gram_index.get(gram, ()))
+        needed = self.threshold * len(grams) / 2
+        candidates = {position for position, count in hits.items() if count >= needed}
+        for token in tokens:
+            candidates.update(self._token_index.get(token, ()))
+        return candidates
+
+    def _best(self, name: str, category=None) -> Optional[Tuple[int, float]]:
+        position = self._keys.get(vendor_name_key(name))
+        if position is not None:
+            return position, 1.0
+        category = _category(category)
+        tokens = vendor_tokens(name)
+        grams = trigrams(tokens)
+        best, best_score = None, 0.0
+        for candidate in sorted(self._candidates(tokens, grams)):
+            if category and self._categories[candidate] not in (None, category):
+                continue
+            score = _similarity(tokens, grams, self._tokens[candidate], self._grams[candidate])
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is None or best_score < self.threshold:
+            return None
+        return best, round(best_score, 3)
+
+    def match(self, name: str, category=None) -> Optional[Tuple[str, float]]:
+        """Best existing vendor name for ``name`` (of the same category, when given) and its
+        similarity, or None below the threshold"""
+        self._ensure_loaded()
+        with self._lock:
+            found = self._best(name, category)
+            return (self._names[found[0]], found[1]) if found else None
+
+    def resolve(self, name: str, category=None) -> str:
+        """Canonical existing vendor name for ``name``; unknown names are indexed and returned unchanged"""
+        found = self.match(name, category)
+        if found is not None:
+            if found[0] != name:
+                logger.info(f"Resolved vendor {name!r} to {found[0]!r} (similarity {found[1]})")
+            return found[0]
+        self.remember(name, category)
+        return name.strip()
+
+    def find_duplicates(self) -> List[List[Tuple[int, str, int]]]:
+        """Groups of vendors that match each other, each as ``(id, name, bill count)`` with the
+        vendor to keep (most bills, then oldest) first.
+
+        Vendors are visited in that order and each is compared only with the
+        groups' first vendors, so groups never chain through intermediate
+        names ("Pharmacy" ~ "Apollo Pharmacy" ~ "MedPlus Pharmacy") or mix
+        categories.
+        """
+        vendors = sorted(self.db_handler.get_vendor_names(with_bill_counts=True), key=lambda v: (-v[3], v[0]))
+        # Scratch index of group targets; a target's position is its group's index.
+        targets = VendorResolver(self.db_handler, self.threshold)
+        targets._loaded = True
+        groups: List[List[Tuple[int, str, int]]] = []
+        for vendor_id, name, category, bill_count in vendors:
+            found = targets._best(name, category)
+            if found is None:
+                targets._add(name, category)
+                groups.append([(vendor_id, name, bill_count)])
+                continue
+            position = found[0]
+            groups[position].append((vendor_id, name, bill_count))
+            # A target without a category takes its first categorized member's, as merge_vendors does.
+            if targets._categories[position] is None:
+                targets._categories[position] = _category(category)
+        return [group for group in groups if len(group) > 1]
+
+    def dedupe(self, dry_run: bool = False) -> List[Dict]:
+        """Merge every duplicate group into its first vendor; returns what was (or would be) merged"""
+        merges = []
+        for group in self.find_duplicates():
+            (target_id, target_name, _), sources = group[0], group[1:]
+            moved = 0 if dry_run else self.db_handler.merge_vendors(target_id, [v[0] for v in sources])
+            merges.append({
+                "target": target_name,
+                "target_id": target_id,
+                "merged": [name for _, name, _ in sources],
+                "bills_moved": moved,
+            })
+        if merges and not dry_run:
+            self.reset()
+        logger.info(f"{'Found' if dry_run else 'Merged'} {len(merges)} duplicate vendor groups")
+        return merges